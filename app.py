@@ -4,11 +4,14 @@ import base64
 import uuid
 import time
 import threading
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from dotenv import load_dotenv
 import requests
-from github import Github, GithubException
+from github import Github
 import hashlib
+import inspect
+import functools
+import re
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +26,16 @@ except ImportError as e:
     from generators.base_generator import BaseGenerator
     # Fallback generators...
 
+from utils.repo_pool import RepoPool
+from utils.publish_backends import get_publish_backend
+from utils.profiling import JobProfiler, sample_stacks, DEPLOY_THREAD_PREFIX
+from utils.attachment_store import AttachmentStore
+from utils.attachment_fetcher import AttachmentFetcher
+from utils.request_body import decoded_stream, UnsupportedEncodingError, BodyTooLargeError
+from utils.site_budget import analyze_site
+from utils.circuit_breaker import host_breakers, CircuitOpenError
+from utils.job_queue import PriorityJobQueue
+
 app = Flask(__name__)
 
 class DeploymentManager:
@@ -31,65 +44,72 @@ class DeploymentManager:
         self.secret = os.getenv('SECRET')
         self.g = Github(self.github_token) if self.github_token else None
         self.user = self.g.get_user() if self.g else None
+        self.publisher = get_publish_backend(self.user, self.github_token)
+        # Pooled repos live on GitHub, so only GitHub-backed publishers can use them
+        pool_user = self.user if self.publisher.supports_pool else None
+        pool_call = self.publisher.call_api if self.publisher.supports_pool else None
+        self.repo_pool = RepoPool(pool_user, self.get_license_content(), call=pool_call)
+        self.task_repos = {}  # task id -> repo name of its Round 1 deployment
         
     def verify_secret(self, request_secret):
         return request_secret == self.secret
     
     def get_repo(self, repo_url):
         """Get repository from URL"""
-        try:
-            # Extract repo name from URL
-            repo_name = repo_url.split('/')[-1]
-            return self.user.get_repo(repo_name)
-        except:
-            return None
+        # Extract repo name from URL
+        repo_name = repo_url.split('/')[-1]
+        return self.publisher.get_repo(repo_name)
+    
+    def find_task_repo(self, task_id):
+        """Find the repository created for a task in a previous round"""
+        repo_name = self.task_repos.get(task_id)
+        if repo_name:
+            return self.get_repo(repo_name)
+        pattern = re.compile(rf"^task-{re.escape(task_id)}-[0-9a-f]{{8}}$")
+        return self.publisher.find_latest_repo(pattern)
+    
+    def claim_or_create_repo(self, task_id, brief):
+        """Claim a pre-warmed repo from the pool, falling back to a fresh one.
+
+        Returns (repo, repo_name, has_license)."""
+        repo, repo_name = self.repo_pool.claim(task_id, brief)
+        if repo:
+            return repo, repo_name, True
+        repo, repo_name = self.create_repo(task_id, brief)
+        return repo, repo_name, False
     
     def create_repo(self, task_id, brief):
         repo_name = f"task-{task_id}-{str(uuid.uuid4())[:8]}"
-        try:
-            repo = self.user.create_repo(
-                name=repo_name,
-                description=f"Auto-generated project: {brief[:100]}",
-                private=False,
-                auto_init=False
-            )
-            return repo, repo_name
-        except GithubException as e:
-            print(f"Error creating repo: {e}")
+        repo = self.publisher.create_repo(repo_name, f"Auto-generated project: {brief[:100]}")
+        if not repo:
             return None, None
+        return repo, repo_name
     
-    def commit_files(self, repo, files, commit_message="Initial commit"):
-        try:
-            # Start with LICENSE
-            license_content = self.get_license_content()
-            repo.create_file("LICENSE", f"{commit_message} - Add LICENSE", license_content)
-            
-            # Add other files
-            for file_path, content in files.items():
-                repo.create_file(file_path, commit_message, content)
-            
-            return repo.get_branch("main").commit.sha
-        except GithubException as e:
-            print(f"Error committing files: {e}")
-            return None
+    def commit_files(self, repo, files, commit_message="Initial commit", include_license=True,
+                     existing_files=None):
+        """Commit files to a new repository.
+
+        Pass existing_files when an earlier attempt may have written some of
+        them already, so they are updated instead of created twice."""
+        # Start with LICENSE (pooled repos already have it)
+        if include_license:
+            files = {"LICENSE": self.get_license_content(), **files}
+        return self.publisher.publish(repo, files, commit_message, existing_files=existing_files)
     
-    def update_repo(self, repo, files, commit_message="Update for round 2"):
+    def update_repo(self, repo, files, commit_message="Update for round 2", existing_files=None):
         """Update existing repository with new files"""
-        try:
-            for file_path, content in files.items():
-                try:
-                    # Try to get file to see if it exists
-                    file_contents = repo.get_contents(file_path)
-                    # Update existing file
-                    repo.update_file(file_path, commit_message, content, file_contents.sha)
-                except:
-                    # Create new file
-                    repo.create_file(file_path, commit_message, content)
-            
-            return repo.get_branch("main").commit.sha
-        except GithubException as e:
-            print(f"Error updating repo: {e}")
-            return None
+        if existing_files is None:
+            existing_files = {}
+        return self.publisher.publish(repo, files, commit_message, existing_files=existing_files)
+    
+    def head_sha(self, repo):
+        return self.publisher.head_sha(repo)
+    
+    def repo_url(self, repo_name):
+        return self.publisher.repo_url(repo_name)
+    
+    def pages_url(self, repo_name):
+        return self.publisher.pages_url(repo_name)
     
     def get_license_content(self):
         return """MIT License
@@ -115,6 +135,10 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE."""
 
 deployment_manager = DeploymentManager()
+deployment_manager.repo_pool.start()
+job_profiler = JobProfiler()
+attachment_store = AttachmentStore()
+attachment_fetcher = AttachmentFetcher(attachment_store)
 
 def get_generator(brief):
     brief_lower = brief.lower()
@@ -127,44 +151,167 @@ def get_generator(brief):
     else:
         return SumOfSalesGenerator()
 
-def process_attachments(attachments):
+@functools.lru_cache(maxsize=None)
+def generator_version(generator_class):
+    """Hash of the source of a generator class and its bases, so cached
+    output is invalidated whenever the generator's templates change"""
+    digest = hashlib.sha256()
+    for cls in generator_class.__mro__:
+        if cls.__module__ in ('builtins', 'abc'):
+            continue
+        try:
+            digest.update(inspect.getsource(inspect.getmodule(cls)).encode())
+        except (OSError, TypeError):
+            digest.update(cls.__qualname__.encode())
+    return digest.hexdigest()
+
+def process_attachments(attachments, digests=None):
+    """Decode attachments, reusing previously decoded copies from the store.
+    
+    http(s) attachments are downloaded concurrently into the store. If digests
+    is given it is filled with name -> sha256 of each attachment's bytes."""
+    remote = {
+        a['name']: a['url'] for a in attachments
+        if a.get('url', '').startswith(('http://', 'https://'))
+    }
+    fetched = attachment_fetcher.fetch_all(remote) if remote else {}
+    
     processed = {}
     for attachment in attachments:
         name = attachment['name']
+        if 'digest' in attachment:
+            # Uploaded as a raw multipart part, already in the store
+            data = attachment_store.get(attachment['digest'])
+            if data is None:
+                raise ValueError(f"Uploaded attachment {name} is no longer in the store")
+            processed[name] = data
+            if digests is not None:
+                digests[name] = attachment['digest']
+            continue
         data_url = attachment['url']
         if data_url.startswith('data:'):
-            base64_data = data_url.split('base64,')[1]
-            decoded_data = base64.b64decode(base64_data)
+            ref_key = hashlib.sha256(data_url.encode()).hexdigest()
+            digest = attachment_store.lookup_ref(ref_key)
+            decoded_data = attachment_store.get(digest) if digest else None
+            if decoded_data is None:
+                base64_data = data_url.split('base64,')[1]
+                decoded_data = base64.b64decode(base64_data)
+                digest = attachment_store.put(decoded_data)
+                attachment_store.put_ref(ref_key, digest)
             processed[name] = decoded_data
+            if digests is not None:
+                digests[name] = digest
+        elif name in fetched:
+            data = attachment_store.get(fetched[name])
+            if data is None:
+                # Evicted by a concurrent put before we could read it back
+                raise ValueError(f"Fetched attachment {name} is no longer in the store")
+            processed[name] = data
+            if digests is not None:
+                digests[name] = fetched[name]
         else:
             processed[name] = data_url
     return processed
 
-def notify_evaluation_with_retry(evaluation_url, data, max_retries=5):
-    """Notify evaluation URL with exponential backoff as required"""
+def generate_round1_files(generator, request_data, attachments, digests):
+    """Run generate_round1, reusing cached output for identical inputs"""
+    if len(digests) != len(attachments):
+        # Some attachments are not content-addressed; cannot key the result
+        return generator.generate_round1(
+            request_data['brief'], request_data.get('checks', []), attachments
+        )
+    key = AttachmentStore.key_for(
+        type(generator).__name__, generator_version(type(generator)), 1, request_data['brief'],
+        request_data.get('checks', []), sorted(digests.items())
+    )
+    cached = attachment_store.get_derived(key, 'round1-files.json')
+    if cached is not None:
+        print(f"♻️ Reusing cached Round 1 output ({key[:12]})")
+        return json.loads(cached)
+    files = generator.generate_round1(
+        request_data['brief'], request_data.get('checks', []), attachments
+    )
+    attachment_store.put_derived(key, 'round1-files.json', json.dumps(files).encode())
+    return files
+
+MAX_JOB_DEFERRALS = int(os.getenv('MAX_JOB_DEFERRALS', 5))
+
+def run_later(delay, target, *args):
+    """Run target(*args) after delay seconds without holding a worker"""
+    timer = threading.Timer(delay, target, args=args)
+    timer.name = f"deferred-{getattr(target, '__name__', 'call')}"
+    timer.daemon = True
+    timer.start()
+
+def notify_evaluation_with_retry(evaluation_url, data, max_retries=5, on_success=None):
+    """Notify evaluation URL with exponential backoff as required
+    
+    Returns True once delivered and False when all attempts failed. While
+    the host's circuit is open the remaining attempts are deferred instead
+    of blocking the worker and None is returned; a deferral uses up an
+    attempt, so a host that stays down is given up on after max_retries.
+    on_success is called once the notification is delivered, including by
+    a deferred retry."""
+    breaker = host_breakers.get(evaluation_url)
     for attempt in range(max_retries):
+        remaining = max_retries - attempt - 1
+        if not breaker.allow():
+            if not remaining:
+                break
+            delay = max(breaker.retry_after(), 1.0)
+            print(f"⏳ Circuit open for {breaker.host}, deferring notification by {delay:.0f}s")
+            run_later(delay, notify_evaluation_with_retry, evaluation_url, data, remaining, on_success)
+            return None
+        start = time.time()
         try:
             response = requests.post(
                 evaluation_url,
                 json=data,
                 headers={'Content-Type': 'application/json'},
-                timeout=30
+                timeout=breaker.timeout()
             )
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success(time.time() - start)
             if response.status_code == 200:
                 print(f"✅ Successfully notified evaluation URL (attempt {attempt + 1})")
+                if on_success:
+                    on_success()
                 return True
         except Exception as e:
+            breaker.record_failure()
             print(f"Attempt {attempt + 1} failed: {e}")
         
         if attempt < max_retries - 1:
             wait_time = 2 ** attempt  # 1, 2, 4, 8 seconds - exponential backoff
+            if breaker.is_open():
+                # Host is failing: hand the remaining attempts to a timer instead of sleeping
+                delay = max(wait_time, breaker.retry_after())
+                print(f"⏳ Circuit open for {breaker.host}, deferring notification by {delay:.0f}s")
+                run_later(delay, notify_evaluation_with_retry, evaluation_url, data, remaining, on_success)
+                return None
             print(f"Waiting {wait_time}s before retry...")
             time.sleep(wait_time)
     
     print("Failed to notify evaluation URL after all retries")
     return False
 
-def process_round1_deployment(request_data):
+def check_site_budget(files, generator, job=None, existing_files=None):
+    """Analyze the generated site's page weight before committing it.
+    
+    The report is recorded on the job. Returns an error message when the site
+    is over budget and SITE_BUDGET_ENFORCE=1, otherwise None."""
+    report = analyze_site(files, type(generator).__name__, existing_files)
+    if job is not None:
+        job.budget_report = report
+    if report['violations']:
+        print(f"📦 Site over performance budget: {'; '.join(report['violations'])}")
+        if report['enforced']:
+            return f"Site over performance budget: {'; '.join(report['violations'])}"
+    return None
+
+def process_round1_deployment(request_data, job=None):
     """Process Round 1 deployment - Create new repository"""
     try:
         # Verify secret
@@ -175,30 +322,44 @@ def process_round1_deployment(request_data):
         generator = get_generator(request_data['brief'])
         
         # Process attachments
-        attachments = process_attachments(request_data.get('attachments', []))
+        digests = {}
+        attachments = process_attachments(request_data.get('attachments', []), digests)
         
         # Generate files for round 1
-        files = generator.generate_round1(
-            request_data['brief'], 
-            request_data.get('checks', []),
-            attachments
-        )
+        files = generate_round1_files(generator, request_data, attachments, digests)
         
-        # Create repo
-        repo, repo_name = deployment_manager.create_repo(
-            request_data['task'], 
-            request_data['brief']
-        )
+        budget_error = check_site_budget(files, generator, job)
+        if budget_error:
+            return None, budget_error
         
-        if not repo:
-            return None, "Failed to create repository"
+        existing_files = None
+        if job is not None and job.repo:
+            # Rerun of a deferred job: finish the repo the earlier run started
+            repo, repo_name, has_license = job.repo
+            existing_files = deployment_manager.publisher.existing_files(repo)
+        else:
+            # Claim a pre-warmed repo or create one
+            repo, repo_name, has_license = deployment_manager.claim_or_create_repo(
+                request_data['task'], 
+                request_data['brief']
+            )
+            
+            if not repo:
+                return None, "Failed to create repository"
+            if job is not None:
+                job.repo = (repo, repo_name, has_license)
         
         # Commit files
-        commit_sha = deployment_manager.commit_files(repo, files, "Initial commit - Round 1")
+        commit_sha = deployment_manager.commit_files(
+            repo, files, "Initial commit - Round 1", include_license=not has_license,
+            existing_files=existing_files
+        )
         
         if not commit_sha:
             return None, "Failed to commit files"
         
+        deployment_manager.task_repos[request_data['task']] = repo_name
+        
         # Build evaluation data EXACTLY as required
         evaluation_data = {
             # Copy from request as required
@@ -207,52 +368,80 @@ def process_round1_deployment(request_data):
             "round": request_data['round'],
             "nonce": request_data['nonce'],
             # Repository details
-            "repo_url": f"https://github.com/{deployment_manager.user.login}/{repo_name}",
+            "repo_url": deployment_manager.repo_url(repo_name),
             "commit_sha": commit_sha,
-            "pages_url": f"https://{deployment_manager.user.login}.github.io/{repo_name}/"
+            "pages_url": deployment_manager.pages_url(repo_name)
         }
         
         return evaluation_data, "Round 1 deployment completed successfully"
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         return None, f"Deployment failed: {str(e)}"
 
-def process_round2_deployment(request_data):
+def process_round2_deployment(request_data, job=None):
     """Process Round 2 deployment - Update existing repository"""
     try:
         # Verify secret
         if not deployment_manager.verify_secret(request_data.get('secret')):
             return None, "Invalid secret"
         
-        # Get the original repo (from previous round)
-        # In a real scenario, you'd track this, but for now we'll extract from brief
-        # or use a different approach based on task ID
-        
-        # For simplicity, we'll create a new repo for round 2 as well
-        # In production, you'd look up the existing repo from your database
-        
         generator = get_generator(request_data['brief'])
         attachments = process_attachments(request_data.get('attachments', []))
         
-        # Generate files for round 2
-        files = generator.generate_round2(
-            request_data['brief'], 
-            request_data.get('checks', []),
-            attachments,
-            {}  # Existing files would be passed here
-        )
-        
-        # Create new repo for round 2 (in real scenario, update existing)
-        repo, repo_name = deployment_manager.create_repo(
-            f"{request_data['task']}-round2", 
-            request_data['brief']
-        )
-        
-        if not repo:
-            return None, "Failed to create repository for round 2"
-        
-        # Commit files
-        commit_sha = deployment_manager.commit_files(repo, files, "Round 2 updates")
+        # Update the repo from the previous round when we can find it
+        repo = deployment_manager.find_task_repo(request_data['task'])
+        if repo:
+            repo_name = repo.name
+            existing_files = deployment_manager.publisher.existing_files(repo)
+            files = generator.generate_round2(
+                request_data['brief'], 
+                request_data.get('checks', []),
+                attachments,
+                existing_files
+            )
+            budget_error = check_site_budget(files, generator, job, existing_files)
+            if budget_error:
+                return None, budget_error
+            if files:
+                commit_sha = deployment_manager.update_repo(
+                    repo, files, "Round 2 updates", existing_files=existing_files
+                )
+            else:
+                # Nothing changed since Round 1
+                commit_sha = deployment_manager.head_sha(repo)
+        else:
+            # No previous round to build on - create a new repo for round 2
+            files = generator.generate_round2(
+                request_data['brief'], 
+                request_data.get('checks', []),
+                attachments,
+                {}
+            )
+            budget_error = check_site_budget(files, generator, job)
+            if budget_error:
+                return None, budget_error
+            
+            existing_files = None
+            if job is not None and job.repo:
+                # Rerun of a deferred job: finish the repo the earlier run started
+                repo, repo_name, _ = job.repo
+                existing_files = deployment_manager.publisher.existing_files(repo)
+            else:
+                repo, repo_name = deployment_manager.create_repo(
+                    f"{request_data['task']}-round2", 
+                    request_data['brief']
+                )
+                
+                if not repo:
+                    return None, "Failed to create repository for round 2"
+                if job is not None:
+                    job.repo = (repo, repo_name, False)
+            
+            commit_sha = deployment_manager.commit_files(
+                repo, files, "Round 2 updates", existing_files=existing_files
+            )
         
         if not commit_sha:
             return None, "Failed to commit files for round 2"
@@ -263,52 +452,140 @@ def process_round2_deployment(request_data):
             "task": request_data['task'],
             "round": request_data['round'],  # This will be 2
             "nonce": request_data['nonce'],
-            "repo_url": f"https://github.com/{deployment_manager.user.login}/{repo_name}",
+            "repo_url": deployment_manager.repo_url(repo_name),
             "commit_sha": commit_sha,
-            "pages_url": f"https://{deployment_manager.user.login}.github.io/{repo_name}/"
+            "pages_url": deployment_manager.pages_url(repo_name)
         }
         
         return evaluation_data, "Round 2 deployment completed successfully"
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         return None, f"Round 2 deployment failed: {str(e)}"
 
-def process_deployment_async(request_data):
-    """Process deployment in background thread"""
+def process_deployment_async(job):
+    """Process a queued deployment on a worker thread, profiling it when requested"""
+    request_data = job.request_data
+    if job_profiler.should_profile(request_data):
+        # Keyed by the job_id /api/deploy returned; deferred reruns get their own entry
+        profile_id = f"{job.id}-retry{job.deferrals}" if job.deferrals else job.id
+        return job_profiler.run(profile_id, run_deployment, job)
+    return run_deployment(job)
+
+def run_deployment(job):
+    """Run a deployment and notify the evaluation URL"""
+    request_data = job.request_data
     try:
         round_num = request_data.get('round', 1)
         
         if round_num == 1:
-            evaluation_data, message = process_round1_deployment(request_data)
+            evaluation_data, message = process_round1_deployment(request_data, job)
         elif round_num == 2:
-            evaluation_data, message = process_round2_deployment(request_data)
+            evaluation_data, message = process_round2_deployment(request_data, job)
         else:
             print(f"Unsupported round: {round_num}")
             return
         
+        job.message = message
         if evaluation_data:
             # Notify evaluation URL with retry mechanism
             success = notify_evaluation_with_retry(
                 request_data['evaluation_url'], 
-                evaluation_data
+                evaluation_data,
+                on_success=lambda: job_queue.record_notified(job)
             )
             
             if success:
                 print(f"✅ Round {round_num} completed: {message}")
                 print(f"📊 Repo: {evaluation_data['repo_url']}")
+            elif success is None:
+                print(f"⏳ Round {round_num} completed, notification deferred: {message}")
             else:
                 print(f"⚠️ Round {round_num} completed but notification failed: {message}")
         else:
             print(f"❌ Deployment failed: {message}")
             
+    except CircuitOpenError as e:
+        # GitHub is failing fast; retry the whole job once the circuit can probe again
+        if job.deferrals < MAX_JOB_DEFERRALS:
+            delay = max(e.retry_after, 1.0)
+            print(f"⏳ {e} - deferring task {request_data['task']} by {delay:.0f}s")
+            job_queue.defer(job, delay)
+        else:
+            print(f"❌ Deployment failed: {e} (gave up after {job.deferrals} deferrals)")
     except Exception as e:
         print(f"💥 Error in deployment process: {e}")
 
+def estimate_job_cost(request_data):
+    """Job kind (generator and round) and attachment payload size for scheduling"""
+    generator = get_generator(request_data['brief'])
+    kind = f"{type(generator).__name__}-r{request_data.get('round', 1)}"
+    size_bytes = sum(
+        a.get('size') or len(a.get('url', '')) for a in request_data.get('attachments', [])
+    )
+    return kind, size_bytes
+
+job_queue = PriorityJobQueue(process_deployment_async, thread_prefix=DEPLOY_THREAD_PREFIX)
+job_queue.start()
+
+def drop_client_store_refs(request_data):
+    """Remove digest/size keys from client-supplied attachments.
+    
+    Those keys point into the attachment store; only read_multipart_request
+    may set them, for parts it stored itself."""
+    if isinstance(request_data, dict) and isinstance(request_data.get('attachments'), list):
+        request_data['attachments'] = [
+            {k: v for k, v in a.items() if k not in ('digest', 'size')} if isinstance(a, dict) else a
+            for a in request_data['attachments']
+        ]
+    return request_data
+
+def read_multipart_request():
+    """Task JSON from the 'request' form field plus raw binary attachment parts.
+    
+    Each file part is streamed into the attachment store and referenced by
+    digest, so attachments never go through base64 or the JSON parser."""
+    raw = request.form.get('request')
+    if not raw:
+        return None
+    request_data = drop_client_store_refs(json.loads(raw))
+    if not deployment_manager.verify_secret(request_data.get('secret')):
+        # Don't store uploads from unauthenticated clients; deploy() rejects it
+        return request_data
+    attachments = list(request_data.get('attachments', []))
+    for field, upload in request.files.items(multi=True):
+        digest, size = attachment_store.put_stream(upload.stream)
+        attachments.append({"name": upload.filename or field, "digest": digest, "size": size})
+    request_data['attachments'] = attachments
+    return request_data
+
+def read_request_data():
+    """Deploy request from a JSON body (optionally gzip/deflate/zstd compressed)
+    or a multipart form.
+    
+    Compression only reduces wire size: json.load reads the whole
+    decompressed document (up to MAX_DECOMPRESSED_BYTES) before parsing.
+    Large attachments belong in multipart parts, which are streamed."""
+    if request.mimetype == 'multipart/form-data':
+        return read_multipart_request()
+    encoding = request.headers.get('Content-Encoding')
+    if encoding and encoding.strip().lower() != 'identity':
+        return drop_client_store_refs(json.load(decoded_stream(request.stream, encoding)))
+    return drop_client_store_refs(request.get_json())
+
 @app.route('/api/deploy', methods=['POST'])
 def deploy():
     """Main deployment endpoint - Handles both Round 1 and Round 2"""
     try:
-        request_data = request.get_json()
+        try:
+            request_data = read_request_data()
+        except UnsupportedEncodingError as e:
+            return jsonify({"status": "error", "message": str(e)}), 415
+        except BodyTooLargeError as e:
+            return jsonify({"status": "error", "message": str(e)}), 413
+        except (ValueError, EOFError, OSError) as e:
+            return jsonify({"status": "error", "message": f"Could not decode request body: {e}"}), 400
         
         if not request_data:
             return jsonify({
@@ -333,10 +610,9 @@ def deploy():
                 "message": "Invalid secret"
             }), 401
         
-        # Start async processing
-        thread = threading.Thread(target=process_deployment_async, args=(request_data,))
-        thread.daemon = True
-        thread.start()
+        # Queue for async processing
+        kind, size_bytes = estimate_job_cost(request_data)
+        job = job_queue.submit(request_data, kind, size_bytes)
         
         # Return immediate response as required
         round_num = request_data.get('round', 1)
@@ -344,7 +620,8 @@ def deploy():
             "status": "accepted",
             "message": f"Round {round_num} deployment process started",
             "round": round_num,
-            "task": request_data['task']
+            "task": request_data['task'],
+            "job_id": job.id
         }), 200
         
     except Exception as e:
@@ -359,9 +636,68 @@ def health():
         "status": "healthy", 
         "service": "LLM Deployment API",
         "version": "4.0",
-        "features": ["round1", "round2", "github_pages", "evaluation_notification"]
+        "features": ["round1", "round2", "github_pages", "evaluation_notification", "repo_pool"]
     }), 200
 
+@app.route('/api/breakers', methods=['GET'])
+def breaker_stats():
+    """Per-host circuit breaker state and adaptive timeouts"""
+    return jsonify(host_breakers.stats()), 200
+
+@app.route('/api/queue', methods=['GET'])
+def queue_stats():
+    """Deployment queue depth, wait times and deadline hit rate"""
+    return jsonify(job_queue.stats()), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_result(job_id):
+    """Status and result of a recent deployment job, including its budget report"""
+    if not is_admin_request():
+        return jsonify({"status": "error", "message": "Invalid secret"}), 401
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/pool', methods=['GET'])
+def pool_stats():
+    """Repository pool metrics"""
+    return jsonify(deployment_manager.repo_pool.stats()), 200
+
+def is_admin_request():
+    admin_secret = request.headers.get('X-Admin-Secret')
+    return bool(admin_secret) and deployment_manager.verify_secret(admin_secret)
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List captured per-job profiles"""
+    if not is_admin_request():
+        return jsonify({"status": "error", "message": "Invalid secret"}), 401
+    return jsonify({"profiles": job_profiler.list()}), 200
+
+@app.route('/admin/profiles/<job_id>', methods=['GET'])
+def get_profile(job_id):
+    """Return the cProfile stats captured for one job"""
+    if not is_admin_request():
+        return jsonify({"status": "error", "message": "Invalid secret"}), 401
+    profile = job_profiler.get(job_id)
+    if not profile:
+        return jsonify({"status": "error", "message": f"No profile for {job_id}"}), 404
+    return Response(profile["stats"], mimetype='text/plain')
+
+@app.route('/admin/stacks', methods=['GET'])
+def stacks():
+    """Sample deployment thread stacks and return collapsed stacks for flamegraphs"""
+    if not is_admin_request():
+        return jsonify({"status": "error", "message": "Invalid secret"}), 401
+    try:
+        seconds = min(float(request.args.get('seconds', 5)), 60.0)
+        interval = max(float(request.args.get('interval', 0.01)), 0.001)
+    except ValueError:
+        return jsonify({"status": "error", "message": "seconds and interval must be numbers"}), 400
+    collapsed, samples = sample_stacks(seconds, interval)
+    return Response(collapsed, mimetype='text/plain', headers={"X-Samples": str(samples)})
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 10000))
     print(f"🚀 LLM Deployment API v4.0 - Round 1 & 2 Support")
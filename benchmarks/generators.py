@@ -0,0 +1,159 @@
+"""Micro-benchmarks for the site generators with regression gating.
+
+Runs generate_round1 / generate_round2 of every generator over synthetic
+attachments of growing size and records wall time, peak allocations
+(tracemalloc) and output size. Results are compared with the stored
+baseline and the run exits non-zero on a regression.
+
+    python benchmarks/generators.py                     # compare with baseline
+    python benchmarks/generators.py --sizes 1K 1M 256M  # custom input sizes
+    python benchmarks/generators.py --update-baseline   # record a new baseline
+
+Timings are machine dependent: refresh the baseline when changing machines.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators.sum_of_sales import SumOfSalesGenerator
+from generators.markdown_to_html import MarkdownToHtmlGenerator
+from generators.github_user_created import GithubUserCreatedGenerator
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generators_baseline.json')
+DEFAULT_SIZES = ['1K', '64K', '1M', '16M']
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+def parse_size(text):
+    text = text.upper().rstrip('B')
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+def synthetic_csv(size, revision=0):
+    rows = ["product,sales"]
+    total = len(rows[0]) + 1
+    i = 0
+    while total < size:
+        row = f"Product {i},{(i * 37 + revision) % 1000}.{i % 100:02d}"
+        rows.append(row)
+        total += len(row) + 1
+        i += 1
+    return ("\n".join(rows) + "\n").encode()
+
+def synthetic_markdown(size, revision=0):
+    block = (
+        f"## Section {revision}\n\nSome **bold** text, some *italic* text and `inline code`.\n\n"
+        "```python\nprint('hello')\n```\n\n- item one\n- item two\n\n"
+    )
+    return (block * (size // len(block) + 1))[:size].encode()
+
+def cases(sizes):
+    """Yield (name, callable) pairs, one per generator, round and input size"""
+    sales, markdown, github = SumOfSalesGenerator(), MarkdownToHtmlGenerator(), GithubUserCreatedGenerator()
+    for label in sizes:
+        size = parse_size(label)
+        csv_attachments = {'data.csv': synthetic_csv(size)}
+        md_attachments = {'input.md': synthetic_markdown(size)}
+        # Round 2 brings a revised attachment of the same size
+        csv_revision = {'data.csv': synthetic_csv(size, revision=1)}
+        md_revision = {'input.md': synthetic_markdown(size, revision=1)}
+        sales_r1 = sales.generate_round1("sum of sales", [], csv_attachments)
+        md_r1 = markdown.generate_round1("markdown to html", [], md_attachments)
+        yield (f"sum_of_sales.round1[{label}]",
+               lambda: sales.generate_round1("sum of sales", [], csv_attachments))
+        yield (f"sum_of_sales.round2[{label}]",
+               lambda: sales.generate_round2("sum of sales product-sales", [], csv_revision, sales_r1))
+        yield (f"markdown_to_html.round1[{label}]",
+               lambda: markdown.generate_round1("markdown to html", [], md_attachments))
+        yield (f"markdown_to_html.round2[{label}]",
+               lambda: markdown.generate_round2("markdown to html", [], md_revision, md_r1))
+    yield ("github_user_created.round1",
+           lambda: github.generate_round1("github user github-user-abc123", [], {}))
+    yield ("github_user_created.round2",
+           lambda: github.generate_round2("github user github-user-abc123", [], {}, {}))
+
+def output_size(files):
+    return sum(len(c.encode('utf-8') if isinstance(c, str) else c) for c in (files or {}).values())
+
+def measure(fn, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            files = fn()
+            timings.append(time.perf_counter() - start)
+        # Separate run for memory: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak, "output_bytes": output_size(files)}
+
+def compare(name, result, baseline, args):
+    """Return a list of regression messages for one case"""
+    problems = []
+    if baseline is None:
+        return problems
+    slower = result["seconds"] - baseline["seconds"]
+    if slower > args.min_seconds and result["seconds"] > baseline["seconds"] * (1 + args.time_tolerance):
+        problems.append(f"{name}: time {baseline['seconds'] * 1000:.2f}ms -> {result['seconds'] * 1000:.2f}ms")
+    if result["peak_bytes"] > baseline["peak_bytes"] * (1 + args.memory_tolerance) + args.min_bytes:
+        problems.append(f"{name}: peak memory {baseline['peak_bytes']} -> {result['peak_bytes']} bytes")
+    if result["output_bytes"] > baseline["output_bytes"] * (1 + args.memory_tolerance) + args.min_bytes:
+        problems.append(f"{name}: output size {baseline['output_bytes']} -> {result['output_bytes']} bytes")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="input sizes, e.g. 1K 4M 256M")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.5,
+                        help="allowed relative slowdown (default 0.5 = 50%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.2)
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help="ignore slowdowns smaller than this, to absorb timer noise")
+    parser.add_argument('--min-bytes', type=int, default=4096)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results, problems = {}, []
+    print(f"{'case':<36} {'ms':>10} {'peak KB':>12} {'output KB':>12}")
+    for name, fn in cases(args.sizes):
+        result = measure(fn, args.repeat)
+        results[name] = result
+        regressions = compare(name, result, baseline.get(name), args)
+        problems.extend(regressions)
+        flag = "  REGRESSION" if regressions else ""
+        print(f"{name:<36} {result['seconds'] * 1000:>10.2f} {result['peak_bytes'] / 1024:>12.1f} "
+              f"{result['output_bytes'] / 1024:>12.1f}{flag}")
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if problems:
+        print("\nPerformance regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\nNo regressions against baseline" if baseline else "\nNo baseline to compare against")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Per-deployment latency of the publish backends.
+
+Starts a local smart-HTTP git server (git http-backend) as a stand-in for
+GitHub, optionally with an artificial round-trip delay, and times a Round 1
+publish followed by a Round 2 update for each backend and file count.
+
+    python benchmarks/publish_backends.py --files 1 10 50 --rtt-ms 50
+
+The REST backend needs a real GitHub account, so it is not timed here; with
+--rtt-ms its cost is roughly one round trip per file plus the branch lookup.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.publish_backends import GitPushPublishBackend, LocalPublishBackend
+
+def make_git_handler(project_root, rtt):
+    class GitHTTPHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.run_backend()
+
+        def do_POST(self):
+            self.run_backend()
+
+        def run_backend(self):
+            if rtt:
+                time.sleep(rtt)
+            path, _, query = self.path.partition('?')
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b""
+            env = dict(os.environ,
+                       GIT_PROJECT_ROOT=project_root,
+                       GIT_HTTP_EXPORT_ALL="1",
+                       REMOTE_USER="bench",
+                       REQUEST_METHOD=self.command,
+                       PATH_INFO=path,
+                       QUERY_STRING=query,
+                       CONTENT_TYPE=self.headers.get('Content-Type', ''),
+                       CONTENT_LENGTH=str(len(body)))
+            result = subprocess.run(['git', 'http-backend'], input=body,
+                                    capture_output=True, env=env)
+            header_blob, _, payload = result.stdout.partition(b"\r\n\r\n")
+            status = 200
+            headers = []
+            for line in header_blob.decode().split("\r\n"):
+                if not line:
+                    continue
+                key, _, value = line.partition(":")
+                if key.lower() == "status":
+                    status = int(value.strip().split()[0])
+                else:
+                    headers.append((key, value.strip()))
+            self.send_response(status)
+            for key, value in headers:
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return GitHTTPHandler
+
+def synthetic_files(count, size=2048):
+    return {f"file_{i}.txt": ("x" * (size - 12)) + f"{i:010d}\n" for i in range(count)}
+
+def time_git_push(base_url, project_root, files, round2_files):
+    backend = GitPushPublishBackend(user=None, base_url=base_url)
+    name = f"bench-{time.time_ns()}.git"
+    subprocess.run(['git', 'init', '-q', '--bare', '-b', 'main', os.path.join(project_root, name)],
+                   check=True)
+    url = f"{base_url}/{name}"
+    start = time.perf_counter()
+    backend.push(url, files, "Initial commit - Round 1")
+    backend.push(url, round2_files, "Round 2 updates")
+    return time.perf_counter() - start
+
+def time_local(root, layout, files, round2_files):
+    backend = LocalPublishBackend(root=root, layout=layout)
+    start = time.perf_counter()
+    repo = backend.create_repo(f"bench-{time.time_ns()}", "benchmark")
+    backend.publish(repo, files, "Initial commit - Round 1")
+    backend.publish(repo, round2_files, "Round 2 updates", existing_files=backend.existing_files(repo))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rtt-ms', type=float, default=0.0,
+                        help="artificial delay added to every request to the git server")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="publish-bench-")
+    project_root = os.path.join(workdir, 'server')
+    os.makedirs(project_root)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_git_handler(project_root, args.rtt_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        print(f"{'backend':<12} {'files':>6} {'median ms':>10} {'min ms':>10}")
+        for count in args.files:
+            files = synthetic_files(count)
+            round2_files = dict(list(files.items())[:max(1, count // 5)])
+            round2_files = {path: content + "changed\n" for path, content in round2_files.items()}
+            runs = {
+                'git-push': lambda: time_git_push(base_url, project_root, files, round2_files),
+                'local-bare': lambda: time_local(os.path.join(workdir, 'bare'), 'bare', files, round2_files),
+                'local-dir': lambda: time_local(os.path.join(workdir, 'dir'), 'dir', files, round2_files),
+            }
+            for name, run in runs.items():
+                timings = [run() for _ in range(args.repeat)]
+                print(f"{name:<12} {count:>6} {statistics.median(timings) * 1000:>10.1f} "
+                      f"{min(timings) * 1000:>10.1f}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from utils.git_objects import hash_object
 
 class BaseGenerator(ABC):
     @abstractmethod
@@ -8,9 +9,33 @@ class BaseGenerator(ABC):
     
     @abstractmethod
     def generate_round2(self, brief, checks, attachments, existing_files):
-        """Generate files for Round 2 - Modifications/updates"""
+        """Generate files for Round 2 - Modifications/updates
+        
+        existing_files maps path -> content of the previous round's repo and
+        may be lazy, so only look up the files you actually need."""
         pass
     
+    def only_changed(self, files, existing_files):
+        """Drop files whose content is identical to the previous round.
+
+        When existing_files knows blob shas (sha_of), files are compared by
+        hashing them locally, so nothing is downloaded."""
+        if not files or not existing_files:
+            return files
+        sha_of = getattr(existing_files, 'sha_of', None)
+        return {
+            path: content for path, content in files.items()
+            if self._changed(path, content, existing_files, sha_of)
+        }
+
+    @staticmethod
+    def _changed(path, content, existing_files, sha_of):
+        existing_sha = sha_of(path) if sha_of else None
+        if existing_sha:
+            raw = content.encode('utf-8') if isinstance(content, str) else content
+            return hash_object("blob", raw)[0] != existing_sha
+        return path not in existing_files or existing_files[path] != content
+    
     def create_readme(self, brief, setup_instructions, usage_instructions, round_num=1):
         return f"""# Project - Round {round_num}
 
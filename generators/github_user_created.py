@@ -105,4 +105,5 @@ class GithubUserCreatedGenerator(BaseGenerator):
         return files
     
     def generate_round2(self, brief, checks, attachments, existing_files):
-        return self.generate_round1(brief, checks, attachments)
\ No newline at end of file
+        files = self.generate_round1(brief, checks, attachments)
+        return self.only_changed(files, existing_files)
\ No newline at end of file
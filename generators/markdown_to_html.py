@@ -1,13 +1,16 @@
 from .base_generator import BaseGenerator
 
 class MarkdownToHtmlGenerator(BaseGenerator):
-    def generate_round1(self, brief, checks, attachments):
-        # Get markdown content from attachments
+    def generate_round1(self, brief, checks, attachments, existing_files=None):
+        # Get markdown content from attachments, then the previous round
         markdown_content = ""
         if 'input.md' in attachments:
             markdown_content = attachments['input.md'].decode('utf-8')
+        elif existing_files and 'input.md' in existing_files:
+            markdown_content = existing_files['input.md']
         else:
             markdown_content = "# Sample Markdown\n\nThis is **bold** and this is *italic*."
+        escaped_markdown = markdown_content.replace('`', '\\`')
         
         html_content = f"""<!DOCTYPE html>
 <html lang="en">
@@ -35,7 +38,7 @@ class MarkdownToHtmlGenerator(BaseGenerator):
         }});
         
         // Convert and display markdown
-        const markdownContent = `{markdown_content.replace('`', '\\`')}`;
+        const markdownContent = `{escaped_markdown}`;
         document.getElementById('markdown-output').innerHTML = marked.parse(markdownContent);
         
         // Apply highlighting
@@ -61,4 +64,5 @@ class MarkdownToHtmlGenerator(BaseGenerator):
         return files
     
     def generate_round2(self, brief, checks, attachments, existing_files):
-        return self.generate_round1(brief, checks, attachments)
+        files = self.generate_round1(brief, checks, attachments, existing_files)
+        return self.only_changed(files, existing_files)
@@ -25,18 +25,19 @@ class SumOfSalesGenerator(BaseGenerator):
         seed = self.extract_seed(brief)
         
         if "Bootstrap table" in brief or "product-sales" in brief:
-            return self.add_product_table(brief, seed, attachments)
+            files = self.add_product_table(brief, seed, attachments, existing_files)
         elif "currency" in brief:
-            return self.add_currency_converter(brief, seed, attachments)
+            files = self.add_currency_converter(brief, seed, attachments)
         elif "region" in brief or "filter" in brief:
-            return self.add_region_filter(brief, seed, attachments)
+            files = self.add_region_filter(brief, seed, attachments)
         else:
             # Default round 2 enhancement
-            return self.add_product_table(brief, seed, attachments)
+            files = self.add_product_table(brief, seed, attachments, existing_files)
+        return self.only_changed(files, existing_files)
     
-    def add_product_table(self, brief, seed, attachments):
+    def add_product_table(self, brief, seed, attachments, existing_files=None):
         """Add product sales table for round 2"""
-        csv_data = self.get_csv_data(attachments)
+        csv_data = self.get_csv_data(attachments, existing_files)
         
         html_content = f"""<!DOCTYPE html>
 <html lang="en">
@@ -140,9 +141,12 @@ document.addEventListener('DOMContentLoaded', loadSalesData);"""
         # Seed extraction logic
         return "default"
     
-    def get_csv_data(self, attachments):
+    def get_csv_data(self, attachments, existing_files=None):
         if 'data.csv' in attachments:
             return attachments['data.csv'].decode('utf-8')
+        if existing_files and 'data.csv' in existing_files:
+            # Build on the data committed in the previous round
+            return existing_files['data.csv']
         return "product,sales\\nProduct A,100\\nProduct B,150\\nProduct C,75"
     
     def create_round1_html(self, seed):
@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+from utils.attachment_store import AttachmentStore
+
+def test_put_and_get_by_digest(tmp_path):
+    store = AttachmentStore(root=str(tmp_path))
+    digest = store.put(b"product,sales\nA,1\n")
+    assert store.get(digest) == b"product,sales\nA,1\n"
+    assert store.put_stream(io.BytesIO(b"product,sales\nA,1\n")) == (digest, 18)
+
+@pytest.mark.parametrize("digest", [
+    "../../../../tmp/secretdir",
+    "A" * 64,
+    "0" * 63,
+    "0" * 64 + "\n",
+    None,
+])
+def test_rejects_digests_that_are_not_sha256_hex(tmp_path, digest):
+    store = AttachmentStore(root=str(tmp_path))
+    with pytest.raises(ValueError):
+        store.get(digest)
+
+def test_lookup_ref_ignores_tampered_refs(tmp_path):
+    store = AttachmentStore(root=str(tmp_path))
+    store.put_ref("key", "../../outside")
+    assert store.lookup_ref("key") is None
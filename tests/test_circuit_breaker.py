@@ -0,0 +1,57 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+def make_breaker(**kwargs):
+    options = dict(failure_threshold=2, reset_timeout=5, default_timeout=30)
+    options.update(kwargs)
+    return CircuitBreaker("example.test", **options)
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = make_breaker()
+    assert breaker.allow()
+    trip(breaker)
+    assert breaker.is_open()
+    assert not breaker.allow()
+    assert 4 < breaker.retry_after() <= 5
+
+def test_half_open_lets_one_probe_through():
+    breaker = make_breaker()
+    trip(breaker)
+    breaker.opened_at -= 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_failed_probe_doubles_reset_timeout():
+    breaker = make_breaker()
+    trip(breaker)
+    breaker.opened_at -= 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert breaker.reset_timeout == 10
+
+def test_retry_after_covers_probe_in_flight():
+    breaker = make_breaker()
+    trip(breaker)
+    breaker.opened_at -= 10
+    assert breaker.retry_after() == 0
+    assert breaker.allow()
+    # Other callers must wait for the probe, not retry in a tight loop
+    assert breaker.retry_after() >= 25
+    breaker.probe_started_at = time.time() - 60
+    assert breaker.retry_after() >= breaker.reset_timeout
+
+def test_timeout_follows_latency_percentile():
+    breaker = make_breaker(min_timeout=1, max_timeout=20)
+    assert breaker.timeout() == 30
+    for _ in range(20):
+        breaker.record_success(2.0)
+    assert breaker.timeout() == 6.0
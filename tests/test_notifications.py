@@ -0,0 +1,59 @@
+import importlib
+
+import pytest
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    root = tmp_path_factory.mktemp("app")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("PUBLISH_BACKEND", "local")
+    patch.setenv("LOCAL_PUBLISH_DIR", str(root / "published"))
+    patch.setenv("ATTACHMENT_STORE_DIR", str(root / "store"))
+    yield importlib.import_module("app")
+    patch.undo()
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+@pytest.fixture
+def deferred(app_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, "run_later", lambda delay, target, *args: calls.append((delay, target, args)))
+    return calls
+
+def half_open_with_probe(app_module, url):
+    breaker = app_module.host_breakers.get(url)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout + 1
+    assert breaker.allow()  # another notification's probe is now in flight
+    return breaker
+
+def test_waits_for_probe_instead_of_burning_attempts(app_module, deferred, monkeypatch):
+    url = "http://probe.example.test/notify"
+    breaker = half_open_with_probe(app_module, url)
+    monkeypatch.setattr(app_module.requests, "post", lambda *a, **k: pytest.fail("posted while probing"))
+
+    assert app_module.notify_evaluation_with_retry(url, {}, max_retries=5) is None
+    (delay, target, args), = deferred
+    assert delay >= breaker.reset_timeout
+    assert args[2] == 4
+
+def test_deferred_retry_delivers_once_probe_succeeds(app_module, deferred, monkeypatch):
+    url = "http://recovered.example.test/notify"
+    breaker = half_open_with_probe(app_module, url)
+    assert app_module.notify_evaluation_with_retry(url, {}, max_retries=5) is None
+    breaker.record_success(0.1)
+
+    notified = []
+    monkeypatch.setattr(app_module.requests, "post", lambda *a, **k: Response(200))
+    _, target, args = deferred[0]
+    assert target(*args[:3], lambda: notified.append(True)) is True
+    assert notified == [True]
+
+def test_gives_up_when_last_attempt_is_refused(app_module, deferred):
+    url = "http://down.example.test/notify"
+    half_open_with_probe(app_module, url)
+    assert app_module.notify_evaluation_with_retry(url, {}, max_retries=1) is False
+    assert deferred == []
@@ -0,0 +1,40 @@
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from utils.publish_backends import LocalPublishBackend
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", "--git-dir", repo.path, *args], check=True, capture_output=True, text=True
+    ).stdout
+
+def test_bare_publish_passes_fsck(tmp_path):
+    backend = LocalPublishBackend(root=str(tmp_path), layout="bare")
+    repo = backend.create_repo("task-abc-0001", "test repo")
+
+    first = backend.publish(repo, {"LICENSE": "MIT", "index.html": "<h1>v1</h1>"}, "Round 1")
+    second = backend.publish(
+        repo, {"index.html": "<h1>v2</h1>", "js/app.js": "console.log(1)"}, "Round 2",
+        existing_files=backend.existing_files(repo),
+    )
+
+    git(repo, "fsck", "--strict", "--no-dangling")
+    assert git(repo, "rev-parse", "refs/heads/main").strip() == second
+    assert git(repo, "rev-parse", "main~1").strip() == first
+    assert git(repo, "ls-tree", "-r", "--name-only", "main").split() == ["LICENSE", "index.html", "js/app.js"]
+    assert git(repo, "show", "main:index.html") == "<h1>v2</h1>"
+
+def test_existing_files_and_lookup(tmp_path):
+    backend = LocalPublishBackend(root=str(tmp_path), layout="bare")
+    repo = backend.create_repo("task-abc-0002", "test repo")
+    backend.publish(repo, {"data.csv": "a,b\n1,2\n"}, "Round 1")
+
+    files = backend.existing_files(repo)
+    assert files["data.csv"] == "a,b\n1,2\n"
+    assert files.sha_of("data.csv") == git(repo, "rev-parse", "main:data.csv").strip()
+    assert backend.find_latest_repo(re.compile(r"^task-abc-")).name == "task-abc-0002"
@@ -0,0 +1,97 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import host_breakers
+
+class AttachmentFetchError(Exception):
+    """An http(s) attachment could not be fetched within the limits"""
+
+class AttachmentFetcher:
+    """Fetches http(s) attachments concurrently into the attachment store.
+
+    Downloads share a pooled session, are streamed to disk, and are bounded
+    by ATTACHMENT_MAX_BYTES and ATTACHMENT_FETCH_TIMEOUT (whole download).
+    URLs seen before are revalidated with If-None-Match / If-Modified-Since,
+    so an unchanged remote file costs a 304 instead of a download."""
+
+    def __init__(self, store, max_bytes=None, timeout=None, max_workers=None):
+        self.store = store
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv('ATTACHMENT_MAX_BYTES', 100 * 1024 * 1024))
+        self.timeout = timeout if timeout is not None else float(
+            os.getenv('ATTACHMENT_FETCH_TIMEOUT', 60))
+        self.max_workers = max_workers or int(os.getenv('ATTACHMENT_FETCH_WORKERS', 8))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="attachment-fetch")
+
+    def fetch_all(self, urls):
+        """Fetch {name: url} concurrently and return {name: digest}.
+
+        Raises the first error after all downloads have finished."""
+        futures = {name: self._executor.submit(self.fetch, url) for name, url in urls.items()}
+        digests, error = {}, None
+        for name, future in futures.items():
+            try:
+                digests[name] = future.result()
+            except Exception as e:
+                print(f"Error fetching attachment {name}: {e}")
+                error = error or e
+        if error:
+            raise error
+        return digests
+
+    def fetch(self, url):
+        """Fetch one URL into the store and return its digest"""
+        breaker = host_breakers.get(url)
+        breaker.check()
+        cached = self.store.lookup_url(url)
+        headers = {}
+        if cached:
+            _, etag, last_modified = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        start = time.time()
+        try:
+            response = self.session.get(url, headers=headers, stream=True, timeout=breaker.timeout())
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        with response:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success(time.time() - start)
+            if response.status_code == 304 and cached:
+                return cached[0]
+            response.raise_for_status()
+
+            length = response.headers.get('Content-Length')
+            if length and int(length) > self.max_bytes:
+                raise AttachmentFetchError(f"{url} is {length} bytes, limit is {self.max_bytes}")
+            digest, _ = self.store.put_chunks(self._limited_chunks(response, url, start))
+
+        self.store.put_url(
+            url, digest,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        return digest
+
+    def _limited_chunks(self, response, url, start):
+        received = 0
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise AttachmentFetchError(f"{url} exceeds {self.max_bytes} bytes")
+            if time.time() - start > self.timeout:
+                raise AttachmentFetchError(f"{url} took longer than {self.timeout:.0f}s")
+            yield chunk
@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+class AttachmentStore:
+    """Local content-addressed store for attachments, keyed by sha256.
+
+    Layout under root:
+        objects/<aa>/<digest>/data            raw attachment bytes
+        objects/<aa>/<digest>/derived/<name>  artifacts derived from the entry
+        objects/<aa>/<key>/derived/<name>     artifacts derived from several inputs,
+                                              under a key_for() key (no data file)
+        refs/<key>                            digest an external key resolves to
+        refs/url-<sha256(url)>                digest and validators of a fetched URL
+
+    Entries are evicted least-recently-used first once the store grows past
+    max_bytes."""
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.getenv('ATTACHMENT_STORE_DIR', '.attachment_store')
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv('ATTACHMENT_STORE_MAX_BYTES', 512 * 1024 * 1024))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'refs'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        self._size = self._disk_usage()
+
+    @staticmethod
+    def key_for(*parts):
+        """sha256 over a JSON encoding of parts, for derived-data keys"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def entry_dir(self, digest):
+        if not isinstance(digest, str) or not DIGEST_PATTERN.fullmatch(digest):
+            raise ValueError(f"Invalid attachment digest: {digest!r}")
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def path(self, digest):
+        """Path of the raw bytes for digest, or None if not stored"""
+        path = os.path.join(self.entry_dir(digest), 'data')
+        return path if os.path.exists(path) else None
+
+    def put(self, data):
+        """Store raw bytes and return their sha256 digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.path(digest):
+            self._touch(digest)
+            return digest
+        self._write(digest, 'data', data)
+        return digest
+
+    def put_stream(self, stream, chunk_size=1024 * 1024):
+        """Store a file-like object without holding it in memory.
+
+        Returns (digest, size)."""
+        return self.put_chunks(iter(lambda: stream.read(chunk_size), b""))
+
+    def put_chunks(self, chunks):
+        """Store an iterable of byte chunks; returns (digest, size)"""
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            if self.path(digest):
+                os.remove(tmp_path)
+                self._touch(digest)
+            else:
+                self._commit_tmp(digest, 'data', tmp_path, size)
+            return digest, size
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, digest):
+        path = self.path(digest)
+        if not path:
+            return None
+        self._touch(digest)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def get_derived(self, digest, name):
+        path = os.path.join(self.entry_dir(digest), 'derived', name)
+        if not os.path.exists(path):
+            return None
+        self._touch(digest)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def put_derived(self, digest, name, data):
+        self._write(digest, os.path.join('derived', name), data)
+
+    def lookup_ref(self, key):
+        """Digest previously recorded for key, if its entry is still stored"""
+        try:
+            with open(os.path.join(self.root, 'refs', key)) as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        return digest if DIGEST_PATTERN.fullmatch(digest) and self.path(digest) else None
+
+    def put_ref(self, key, digest):
+        with open(os.path.join(self.root, 'refs', key), 'w') as f:
+            f.write(digest)
+
+    def lookup_url(self, url):
+        """Cached (digest, etag, last_modified) for a fetched URL, or None"""
+        try:
+            with open(self._url_ref(url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        digest = entry.get("digest")
+        if not isinstance(digest, str) or not DIGEST_PATTERN.fullmatch(digest) or not self.path(digest):
+            return None
+        return entry["digest"], entry.get("etag"), entry.get("last_modified")
+
+    def put_url(self, url, digest, etag=None, last_modified=None):
+        with open(self._url_ref(url), 'w') as f:
+            json.dump({"url": url, "digest": digest, "etag": etag, "last_modified": last_modified}, f)
+
+    def _url_ref(self, url):
+        return os.path.join(self.root, 'refs', 'url-' + hashlib.sha256(url.encode()).hexdigest())
+
+    def stats(self):
+        with self._lock:
+            return {"root": self.root, "bytes": self._size, "max_bytes": self.max_bytes}
+
+    def _write(self, digest, relpath, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self._commit_tmp(digest, relpath, tmp_path, len(data))
+
+    def _commit_tmp(self, digest, relpath, tmp_path, size):
+        dest = os.path.join(self.entry_dir(digest), relpath)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        previous = os.path.getsize(dest) if os.path.exists(dest) else 0
+        os.replace(tmp_path, dest)
+        self._touch(digest)
+        with self._lock:
+            self._size += size - previous
+            over = self._size > self.max_bytes
+        if over:
+            self._evict(keep=digest)
+
+    def _touch(self, digest):
+        try:
+            os.utime(self.entry_dir(digest))
+        except OSError:
+            pass
+
+    def _entries(self):
+        objects = os.path.join(self.root, 'objects')
+        for prefix in os.listdir(objects):
+            prefix_dir = os.path.join(objects, prefix)
+            for digest in os.listdir(prefix_dir):
+                yield digest, os.path.join(prefix_dir, digest)
+
+    def _dir_size(self, path):
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def _disk_usage(self):
+        return sum(self._dir_size(path) for _, path in self._entries())
+
+    def _evict(self, keep=None):
+        with self._lock:
+            entries = []
+            for digest, path in self._entries():
+                try:
+                    entries.append((os.path.getmtime(path), digest, path))
+                except OSError:
+                    pass
+            entries.sort()
+            total = sum(self._dir_size(path) for _, _, path in entries)
+            for _, digest, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                size = self._dir_size(path)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+            self._size = total
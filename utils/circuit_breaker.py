@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open"""
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Failure tracking and latency-based timeouts for a single host.
+
+    CLOSED: calls go through; failure_threshold consecutive failures open it.
+    OPEN: calls fail fast until reset_timeout has passed.
+    HALF_OPEN: a single probe call is let through; success closes the circuit,
+    failure re-opens it with a doubled reset timeout (up to max_reset_timeout)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host, failure_threshold=None, reset_timeout=None, max_reset_timeout=None,
+                 default_timeout=None, min_timeout=None, max_timeout=None, percentile=None):
+        self.host = host
+        self.failure_threshold = failure_threshold or int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+        self.base_reset_timeout = reset_timeout or float(os.getenv('BREAKER_RESET_TIMEOUT', 15))
+        self.max_reset_timeout = max_reset_timeout or float(os.getenv('BREAKER_MAX_RESET_TIMEOUT', 300))
+        self.default_timeout = default_timeout or float(os.getenv('HTTP_DEFAULT_TIMEOUT', 30))
+        self.min_timeout = min_timeout or float(os.getenv('HTTP_MIN_TIMEOUT', 2))
+        self.max_timeout = max_timeout or float(os.getenv('HTTP_MAX_TIMEOUT', 30))
+        self.percentile = percentile or float(os.getenv('HTTP_TIMEOUT_PERCENTILE', 99))
+
+        self.state = self.CLOSED
+        self.reset_timeout = self.base_reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started_at = 0.0
+        self.latencies = deque(maxlen=200)
+        self.metrics = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be made now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.state == self.OPEN and time.time() >= self.opened_at + self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.probe_started_at = time.time()
+                return True
+            self.metrics["rejected"] += 1
+            return False
+
+    def check(self):
+        """Like allow() but raises CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(self.host, self.retry_after())
+
+    def is_open(self):
+        with self._lock:
+            return self.state == self.OPEN
+
+    def retry_after(self):
+        """Seconds until a call may be allowed again"""
+        probe_timeout = self.timeout()
+        with self._lock:
+            now = time.time()
+            if self.state == self.CLOSED:
+                return 0.0
+            if self.state == self.HALF_OPEN:
+                if not self.probe_in_flight:
+                    return 0.0
+                # The probe decides the state; it can take up to a full request timeout
+                return max(self.reset_timeout, self.probe_started_at + probe_timeout - now)
+            return max(0.0, self.opened_at + self.reset_timeout - now)
+
+    def record_success(self, latency=None):
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.metrics["successes"] += 1
+            self.failures = 0
+            self.state = self.CLOSED
+            self.reset_timeout = self.base_reset_timeout
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.metrics["failures"] += 1
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+            self.probe_in_flight = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.metrics["opened"] += 1
+        print(f"🔌 Circuit opened for {self.host} for {self.reset_timeout:.0f}s")
+
+    def timeout(self):
+        """Request timeout from the observed latency percentile, with headroom"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < 10:
+            return self.default_timeout
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return min(self.max_timeout, max(self.min_timeout, samples[index] * 3))
+
+    def stats(self):
+        timeout = self.timeout()
+        with self._lock:
+            stats = dict(self.metrics)
+            stats.update({
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "timeout": round(timeout, 3),
+                "samples": len(self.latencies),
+            })
+        return stats
+
+class HostBreakers:
+    """One CircuitBreaker per host, created on first use"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = urlsplit(url).netloc or url
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host)
+            return self._breakers[host]
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.stats() for host, breaker in breakers.items()}
+
+host_breakers = HostBreakers()
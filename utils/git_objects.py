@@ -0,0 +1,156 @@
+import os
+import time
+import zlib
+import struct
+import hashlib
+
+ZERO_SHA = "0" * 40
+
+OBJ_TYPES = {"commit": 1, "tree": 2, "blob": 3}
+
+def hash_object(obj_type, content):
+    """Return (sha, raw) for a git object, raw being header + content"""
+    raw = f"{obj_type} {len(content)}".encode() + b"\0" + content
+    return hashlib.sha1(raw).hexdigest(), raw
+
+class ObjectGraph:
+    """Builds blobs, trees and a commit in memory, ready to be packed or
+    written as loose objects."""
+
+    def __init__(self):
+        self.objects = {}  # sha -> (type, content)
+
+    def add(self, obj_type, content):
+        sha, _ = hash_object(obj_type, content)
+        self.objects[sha] = (obj_type, content)
+        return sha
+
+    def add_blob(self, content):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return self.add("blob", content)
+
+    def build_tree(self, entries):
+        """Build nested trees from {path: (mode, blob sha)} and return the root sha"""
+        root = {}
+        for path, (mode, sha) in entries.items():
+            parts = path.split('/')
+            node = root
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = (mode, sha)
+        return self._write_tree(root)
+
+    def _write_tree(self, node):
+        items = []
+        for name, value in node.items():
+            if isinstance(value, dict):
+                items.append((name + '/', name, "40000", self._write_tree(value)))
+            else:
+                mode, sha = value
+                items.append((name, name, mode, sha))
+        # git orders tree entries as if directory names had a trailing slash
+        items.sort(key=lambda item: item[0].encode())
+        content = b"".join(
+            f"{mode} {name}".encode() + b"\0" + bytes.fromhex(sha)
+            for _, name, mode, sha in items
+        )
+        return self.add("tree", content)
+
+    def add_commit(self, tree_sha, parent_sha, message, author=None, timestamp=None):
+        author = author or "{} <{}>".format(
+            os.getenv('GIT_AUTHOR_NAME', 'LLM Deployment'),
+            os.getenv('GIT_AUTHOR_EMAIL', 'deploy@localhost'),
+        )
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        lines = [f"tree {tree_sha}"]
+        if parent_sha and parent_sha != ZERO_SHA:
+            lines.append(f"parent {parent_sha}")
+        lines.append(f"author {author} {timestamp} +0000")
+        lines.append(f"committer {author} {timestamp} +0000")
+        content = ("\n".join(lines) + "\n\n" + message.rstrip("\n") + "\n").encode()
+        return self.add("commit", content)
+
+    def pack(self):
+        """Serialize all objects as a version 2 packfile (no deltas)"""
+        out = [b"PACK", struct.pack(">II", 2, len(self.objects))]
+        for obj_type, content in self.objects.values():
+            size = len(content)
+            byte = (OBJ_TYPES[obj_type] << 4) | (size & 0x0f)
+            size >>= 4
+            header = bytearray()
+            while size:
+                header.append(byte | 0x80)
+                byte = size & 0x7f
+                size >>= 7
+            header.append(byte)
+            out.append(bytes(header))
+            out.append(zlib.compress(content))
+        data = b"".join(out)
+        return data + hashlib.sha1(data).digest()
+
+    def write_loose(self, git_dir):
+        """Write every object as a loose object into a (bare) repository"""
+        for sha, (obj_type, content) in self.objects.items():
+            path = os.path.join(git_dir, 'objects', sha[:2], sha[2:])
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _, raw = hash_object(obj_type, content)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(raw))
+            os.replace(tmp_path, path)
+
+def read_loose(git_dir, sha):
+    """Read a loose object, returning (type, content)"""
+    with open(os.path.join(git_dir, 'objects', sha[:2], sha[2:]), 'rb') as f:
+        raw = zlib.decompress(f.read())
+    header, content = raw.split(b"\0", 1)
+    return header.split(b" ")[0].decode(), content
+
+def parse_tree(content):
+    """Yield (mode, name, sha) from raw tree content"""
+    pos = 0
+    while pos < len(content):
+        space = content.index(b" ", pos)
+        nul = content.index(b"\0", space)
+        mode = content[pos:space].decode()
+        name = content[space + 1:nul].decode()
+        sha = content[nul + 1:nul + 21].hex()
+        pos = nul + 21
+        yield mode, name, sha
+
+def read_tree_entries(git_dir, commit_sha):
+    """Flatten the tree of a commit in a loose-object repo to {path: (mode, sha)}"""
+    _, commit = read_loose(git_dir, commit_sha)
+    tree_sha = commit.split(b"\n", 1)[0].split(b" ")[1].decode()
+    entries = {}
+    stack = [("", tree_sha)]
+    while stack:
+        prefix, sha = stack.pop()
+        _, content = read_loose(git_dir, sha)
+        for mode, name, child in parse_tree(content):
+            path = prefix + name
+            if mode == "40000":
+                stack.append((path + "/", child))
+            else:
+                entries[path] = (mode, child)
+    return entries
+
+def pkt_line(data):
+    if isinstance(data, str):
+        data = data.encode()
+    return f"{len(data) + 4:04x}".encode() + data
+
+def parse_pkt_lines(data):
+    """Yield pkt-line payloads (None for flush packets)"""
+    pos = 0
+    while pos + 4 <= len(data):
+        length = int(data[pos:pos + 4], 16)
+        if length == 0:
+            yield None
+            pos += 4
+            continue
+        yield data[pos + 4:pos + length]
+        pos += length
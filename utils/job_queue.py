@@ -0,0 +1,236 @@
+import os
+import time
+import uuid
+import datetime
+import threading
+from collections import OrderedDict
+
+class DeploymentJob:
+    """A queued deployment request and its scheduling bookkeeping"""
+
+    def __init__(self, request_data, kind, size_bytes):
+        self.id = str(uuid.uuid4())[:8]
+        self.request_data = request_data  # dropped once the job has run, see release()
+        self.task = request_data.get('task')
+        self.round = request_data.get('round', 1)
+        self.arrival = time.time()
+        self.enqueued_at = self.arrival
+        self.deadline = None
+        self.kind = kind
+        self.size_bytes = size_bytes
+        self.deferrals = 0
+        self.deferred = False
+        self.started_at = None
+        self.finished_at = None
+        self.notified_at = None
+        self.message = None
+        self.budget_report = None
+        self.repo = None  # (repo, repo_name, has_license), reused when a deferred job reruns
+
+    def status(self):
+        if self.deferred:
+            return "deferred"
+        if self.finished_at and self.finished_at >= (self.started_at or 0):
+            return "finished"
+        if self.started_at and self.started_at > self.enqueued_at:
+            return "running"
+        return "queued"
+
+    def release(self):
+        """Free the request (attachments included) once nothing will rerun it;
+        to_dict only needs the bookkeeping fields"""
+        self.request_data = None
+        self.repo = None
+
+    def to_dict(self):
+        """Job result for the API (never includes the request's secret)"""
+        return {
+            "job_id": self.id,
+            "task": self.task,
+            "round": self.round,
+            "status": self.status(),
+            "kind": self.kind,
+            "arrival": self.arrival,
+            "deadline": self.deadline,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "notified_at": self.notified_at,
+            "notified_within_deadline": bool(self.notified_at and self.notified_at <= self.deadline),
+            "deferrals": self.deferrals,
+            "message": self.message,
+            "budget_report": self.budget_report,
+        }
+
+class PriorityJobQueue:
+    """Deployment queue served by a fixed pool of worker threads.
+
+    The next job is the one with the least slack, i.e. time left until its
+    deadline minus its estimated run time. Round 2 jobs get a bonus, jobs that
+    can no longer make their deadline are pushed back so they do not drag
+    others past theirs, and any job waiting longer than starvation_seconds
+    jumps the queue (oldest first)."""
+
+    def __init__(self, handler, workers=None, round1_sla=None, round2_sla=None,
+                 round2_bonus=None, starvation_seconds=None, seconds_per_mb=None,
+                 thread_prefix="deploy", history=None):
+        self.handler = handler
+        self.workers = workers or int(os.getenv('DEPLOY_WORKERS', 4))
+        self.slas = {
+            1: round1_sla or float(os.getenv('ROUND1_SLA_SECONDS', 600)),
+            2: round2_sla or float(os.getenv('ROUND2_SLA_SECONDS', 300)),
+        }
+        self.round2_bonus = round2_bonus if round2_bonus is not None else float(
+            os.getenv('ROUND2_PRIORITY_BONUS', 60))
+        self.starvation_seconds = starvation_seconds or float(os.getenv('STARVATION_SECONDS', 900))
+        self.seconds_per_mb = seconds_per_mb if seconds_per_mb is not None else float(
+            os.getenv('COST_SECONDS_PER_MB', 2))
+        self.thread_prefix = thread_prefix
+        self.history = history or int(os.getenv('JOB_HISTORY', 200))
+
+        self._jobs = []
+        self._cond = threading.Condition()
+        self._threads = []
+        self._durations = {}  # kind -> EWMA of observed run time
+        self._recent = OrderedDict()  # job id -> job, for result lookups
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "notified": 0,
+            "notified_within_deadline": 0,
+            "deferred": 0,
+            "starved_promotions": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.thread_prefix}-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, request_data, kind="default", size_bytes=0):
+        deadline = self._parse_deadline(request_data.get('deadline'))
+        job = DeploymentJob(request_data, kind, size_bytes)
+        job.deadline = deadline or job.arrival + self.slas.get(job.round, self.slas[1])
+        with self._cond:
+            self._jobs.append(job)
+            self._recent[job.id] = job
+            while len(self._recent) > self.history:
+                self._recent.popitem(last=False)
+            self.metrics["submitted"] += 1
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._recent.get(job_id)
+
+    def defer(self, job, delay):
+        """Put job back in the queue after delay seconds, without holding a worker"""
+        job.deferred = True
+        job.deferrals += 1
+        with self._cond:
+            self.metrics["deferred"] += 1
+        timer = threading.Timer(delay, self._requeue, args=(job,))
+        timer.name = f"deferred-job-{job.id}"
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, job):
+        job.deferred = False
+        job.enqueued_at = time.time()
+        job.started_at = None
+        job.finished_at = None
+        with self._cond:
+            self._jobs.append(job)
+            self._cond.notify()
+
+    def record_notified(self, job):
+        """Record that the evaluation URL for job was notified"""
+        job.notified_at = time.time()
+        with self._cond:
+            self.metrics["notified"] += 1
+            if job.notified_at <= job.deadline:
+                self.metrics["notified_within_deadline"] += 1
+
+    def estimated_cost(self, job):
+        base = self._durations.get(job.kind, 10.0)
+        return base + job.size_bytes / (1024 * 1024) * self.seconds_per_mb
+
+    def priority(self, job, now):
+        """Lower runs first"""
+        slack = job.deadline - now - self.estimated_cost(job)
+        if job.round == 2:
+            slack -= self.round2_bonus
+        if job.deadline - now < self.estimated_cost(job):
+            # Cannot make it anyway; serve jobs that still can first
+            slack += self.starvation_seconds
+        return slack
+
+    def _next_job(self):
+        now = time.time()
+        starved = [j for j in self._jobs if now - j.enqueued_at >= self.starvation_seconds]
+        if starved:
+            job = min(starved, key=lambda j: j.enqueued_at)
+            self.metrics["starved_promotions"] += 1
+        else:
+            job = min(self._jobs, key=lambda j: self.priority(j, now))
+        self._jobs.remove(job)
+        self.metrics["wait_seconds_total"] += now - job.enqueued_at
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                job = self._next_job()
+            job.started_at = time.time()
+            try:
+                self.handler(job)
+            except Exception as e:
+                print(f"💥 Error in deployment worker: {e}")
+            job.finished_at = time.time()
+            with self._cond:
+                if job.deferred:
+                    # Deferred runs fail fast and would drag the cost estimate down
+                    continue
+                job.release()
+                self.metrics["completed"] += 1
+                duration = job.finished_at - job.started_at
+                previous = self._durations.get(job.kind)
+                self._durations[job.kind] = duration if previous is None else 0.8 * previous + 0.2 * duration
+
+    @staticmethod
+    def _parse_deadline(value):
+        """Deadline as epoch seconds, from a number or an ISO 8601 string"""
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            print(f"Ignoring unparseable deadline: {value}")
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed.timestamp()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.metrics)
+            stats.update({
+                "queued": len(self._jobs),
+                "workers": self.workers,
+                "estimated_seconds_by_kind": {k: round(v, 3) for k, v in self._durations.items()},
+            })
+        stats["pct_notified_within_deadline"] = round(
+            100.0 * stats["notified_within_deadline"] / stats["completed"], 2
+        ) if stats["completed"] else None
+        stats["avg_wait_seconds"] = round(
+            stats["wait_seconds_total"] / stats["completed"], 3
+        ) if stats["completed"] else None
+        return stats
@@ -0,0 +1,93 @@
+import io
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import Counter, OrderedDict
+
+DEPLOY_THREAD_PREFIX = "deploy"
+
+class JobProfiler:
+    """Opt-in cProfile capture for individual deployment jobs.
+
+    A job is profiled when its request sets "profile": true or when it is
+    picked by PROFILE_SAMPLE_RATE (0.0 - 1.0). Unprofiled jobs run the
+    target directly, so there is no overhead when profiling is off."""
+
+    def __init__(self, sample_rate=None, keep=None):
+        self.sample_rate = sample_rate if sample_rate is not None else float(
+            os.getenv('PROFILE_SAMPLE_RATE', 0))
+        self.keep = keep if keep is not None else int(os.getenv('PROFILE_KEEP', 20))
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def should_profile(self, request_data):
+        if request_data.get('profile') is True:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, job_id, target, *args):
+        """Run target(*args) under cProfile and keep the stats for job_id"""
+        profiler = cProfile.Profile()
+        start = time.time()
+        try:
+            return profiler.runcall(target, *args)
+        finally:
+            elapsed = time.time() - start
+            out = io.StringIO()
+            stats = pstats.Stats(profiler, stream=out)
+            stats.sort_stats('cumulative').print_stats(50)
+            with self._lock:
+                self._profiles[job_id] = {
+                    "job_id": job_id,
+                    "captured_at": start,
+                    "wall_seconds": round(elapsed, 4),
+                    "stats": out.getvalue(),
+                }
+                while len(self._profiles) > self.keep:
+                    self._profiles.popitem(last=False)
+            print(f"🔬 Captured profile for {job_id} ({elapsed:.2f}s)")
+
+    def list(self):
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k != "stats"}
+                for p in self._profiles.values()
+            ]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._profiles.get(job_id)
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def sample_stacks(duration=5.0, interval=0.01, thread_prefix=DEPLOY_THREAD_PREFIX):
+    """Sample the stacks of all deployment threads for `duration` seconds.
+
+    Returns flamegraph-ready collapsed stacks ("root;...;leaf count" per line)
+    and the number of samples taken."""
+    counts = Counter()
+    me = threading.get_ident()
+    samples = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, "")
+            if ident == me or not name.startswith(thread_prefix):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(name)
+            counts[";".join(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+    lines = [f"{stack} {count}" for stack, count in counts.most_common()]
+    return "\n".join(lines) + ("\n" if lines else ""), samples
@@ -0,0 +1,450 @@
+import os
+import time
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+import requests
+from github import GithubException
+
+from .repo_files import RepoFilesView
+from .circuit_breaker import host_breakers
+from .git_objects import (
+    ZERO_SHA, ObjectGraph, read_loose, read_tree_entries, pkt_line, parse_pkt_lines
+)
+
+class PublishBackend(ABC):
+    """Where generated repositories and their files get published"""
+
+    # Whether pre-warmed GitHub repos from RepoPool can be used with this backend
+    supports_pool = False
+
+    @abstractmethod
+    def create_repo(self, repo_name, description):
+        """Create an empty repository, returning a handle with a .name or None"""
+        pass
+
+    @abstractmethod
+    def get_repo(self, repo_name):
+        """Return the repository handle for repo_name or None"""
+        pass
+
+    @abstractmethod
+    def find_latest_repo(self, pattern):
+        """Most recently created repository whose name matches a compiled regex"""
+        pass
+
+    @abstractmethod
+    def publish(self, repo, files, commit_message, existing_files=None):
+        """Write files on top of main and return the new head sha or None.
+
+        existing_files is None for a freshly created repository, otherwise a
+        mapping of the files already on main."""
+        pass
+
+    @abstractmethod
+    def existing_files(self, repo):
+        """Lazy mapping of path -> content for the files on main"""
+        pass
+
+    @abstractmethod
+    def head_sha(self, repo):
+        pass
+
+    @abstractmethod
+    def repo_url(self, repo_name):
+        pass
+
+    @abstractmethod
+    def pages_url(self, repo_name):
+        pass
+
+class RestPublishBackend(PublishBackend):
+    """Publishes through the GitHub REST contents API, one request per file"""
+
+    supports_pool = True
+
+    def __init__(self, user, api_url="https://api.github.com"):
+        self.user = user
+        self.breaker = host_breakers.get(api_url)
+
+    def call_api(self, fn, *args, **kwargs):
+        """Call the GitHub API through the host's circuit breaker.
+
+        Raises CircuitOpenError without calling fn while the circuit is open."""
+        self.breaker.check()
+        start = time.time()
+        try:
+            result = fn(*args, **kwargs)
+        except GithubException as e:
+            # Client errors mean the API is up; only server errors count against it
+            if e.status is None or e.status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success(time.time() - start)
+            raise
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success(time.time() - start)
+        return result
+
+    def create_repo(self, repo_name, description):
+        try:
+            return self.call_api(
+                self.user.create_repo,
+                name=repo_name,
+                description=description,
+                private=False,
+                auto_init=False
+            )
+        except GithubException as e:
+            print(f"Error creating repo: {e}")
+            return None
+
+    def get_repo(self, repo_name):
+        try:
+            return self.call_api(self.user.get_repo, repo_name)
+        except GithubException as e:
+            # Only a missing repo is "no repo"; other failures must not make
+            # callers fall back to creating a different one
+            if e.status == 404:
+                return None
+            raise
+
+    def find_latest_repo(self, pattern):
+        repos = self.call_api(lambda: list(self.user.get_repos()))
+        matches = [r for r in repos if pattern.match(r.name)]
+        if not matches:
+            return None
+        return max(matches, key=lambda r: r.created_at)
+
+    def publish(self, repo, files, commit_message, existing_files=None):
+        try:
+            for file_path, content in files.items():
+                blob_sha = None
+                if existing_files is not None:
+                    blob_sha = self._blob_sha(repo, file_path, existing_files)
+                if blob_sha:
+                    self.call_api(repo.update_file, file_path, commit_message, content, blob_sha)
+                else:
+                    self.call_api(repo.create_file, file_path, commit_message, content)
+            return self.head_sha(repo)
+        except GithubException as e:
+            print(f"Error committing files: {e}")
+            return None
+
+    def _blob_sha(self, repo, file_path, existing_files):
+        sha_of = getattr(existing_files, 'sha_of', None)
+        if sha_of:
+            # The lazy view already knows every blob sha from its tree call
+            return sha_of(file_path)
+        try:
+            return self.call_api(repo.get_contents, file_path).sha
+        except (GithubException, requests.RequestException):
+            return None
+
+    def existing_files(self, repo):
+        return RepoFilesView(repo, call=self.call_api)
+
+    def head_sha(self, repo):
+        return self.call_api(repo.get_branch, "main").commit.sha
+
+    def repo_url(self, repo_name):
+        return f"https://github.com/{self.user.login}/{repo_name}"
+
+    def pages_url(self, repo_name):
+        return f"https://{self.user.login}.github.io/{repo_name}/"
+
+class GitPushPublishBackend(RestPublishBackend):
+    """Builds the commit locally as a git object graph and publishes it with a
+    single smart-HTTP receive-pack request, whatever the number of files.
+
+    Repository creation and lookup still go through the REST API."""
+
+    def __init__(self, user, token=None, base_url=None):
+        super().__init__(user)
+        self.token = token
+        self.base_url = (base_url or os.getenv('GIT_PUSH_BASE_URL', 'https://github.com')).rstrip('/')
+        self.push_breaker = host_breakers.get(self.base_url)
+        self.session = requests.Session()
+        if token:
+            self.session.auth = ('x-access-token', token)
+        self._heads = {}  # remote url -> (head sha, {path: (mode, sha)}) we last pushed
+        self._lock = threading.Lock()
+
+    def remote_url(self, repo_name):
+        return f"{self.base_url}/{self.user.login}/{repo_name}.git"
+
+    def publish(self, repo, files, commit_message, existing_files=None):
+        try:
+            return self.push(
+                self.remote_url(repo.name), files, commit_message,
+                parent_entries=lambda sha: self._remote_entries(repo, sha)
+            )
+        except (requests.RequestException, GithubException, RuntimeError) as e:
+            print(f"Error pushing files: {e}")
+            return None
+
+    def push(self, url, files, commit_message, parent_entries=None, ref="refs/heads/main"):
+        """Push files as one commit on top of ref and return the new commit sha.
+
+        parent_entries(sha) must return {path: (mode, sha)} for a parent commit
+        this backend did not push itself."""
+        with self._lock:
+            known = self._heads.get(url)
+        if known:
+            # We know the head already: skip ref discovery, one round trip total
+            try:
+                return self._push_onto(url, files, commit_message, ref, known[0], dict(known[1]))
+            except RuntimeError as e:
+                print(f"Cached head for {url} is stale, rediscovering: {e}")
+
+        old_sha = self._discover_refs(url).get(ref, ZERO_SHA)
+        entries = {}
+        if old_sha != ZERO_SHA:
+            if not parent_entries:
+                raise RuntimeError(f"{ref} already exists at {old_sha} and its tree is unknown")
+            entries = parent_entries(old_sha)
+        return self._push_onto(url, files, commit_message, ref, old_sha, entries)
+
+    def _push_onto(self, url, files, commit_message, ref, old_sha, entries):
+        graph = ObjectGraph()
+        for file_path, content in files.items():
+            entries[file_path] = ("100644", graph.add_blob(content))
+        tree_sha = graph.build_tree(entries)
+        commit_sha = graph.add_commit(tree_sha, old_sha, commit_message)
+
+        body = (
+            pkt_line(f"{old_sha} {commit_sha} {ref}\0report-status agent=llm-deploy\n")
+            + b"0000"
+            + graph.pack()
+        )
+        response = self._request(
+            'POST',
+            f"{url}/git-receive-pack",
+            data=body,
+            headers={
+                'Content-Type': 'application/x-git-receive-pack-request',
+                'Accept': 'application/x-git-receive-pack-result',
+            }
+        )
+        status = [line.decode().strip() for line in parse_pkt_lines(response.content) if line]
+        if "unpack ok" not in status or f"ok {ref}" not in status:
+            raise RuntimeError(f"Push rejected: {status}")
+
+        with self._lock:
+            self._heads[url] = (commit_sha, entries)
+        return commit_sha
+
+    def _discover_refs(self, url):
+        response = self._request('GET', f"{url}/info/refs", params={'service': 'git-receive-pack'})
+        refs = {}
+        for line in parse_pkt_lines(response.content):
+            if not line or line.startswith(b"#"):
+                continue
+            line = line.split(b"\0")[0].decode().strip()
+            sha, name = line.split(" ", 1)
+            if sha != ZERO_SHA:
+                refs[name] = sha
+        return refs
+
+    def _request(self, method, url, **kwargs):
+        self.push_breaker.check()
+        start = time.time()
+        try:
+            response = self.session.request(method, url, timeout=self.push_breaker.timeout(), **kwargs)
+        except requests.RequestException:
+            self.push_breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.push_breaker.record_failure()
+        else:
+            self.push_breaker.record_success(time.time() - start)
+        response.raise_for_status()
+        return response
+
+    def _remote_entries(self, repo, commit_sha):
+        tree = self.call_api(repo.get_git_tree, commit_sha, recursive=True)
+        return {item.path: (item.mode, item.sha) for item in tree.tree if item.type != "tree"}
+
+class LocalRepo:
+    """Handle for a repository published by LocalPublishBackend"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.created_at = datetime.datetime.fromtimestamp(os.path.getctime(path))
+
+class LocalFilesView(Mapping):
+    """Lazy mapping over files of a local repo; loaders run on first access"""
+
+    def __init__(self, loaders, shas=None):
+        self._loaders = loaders
+        self._shas = shas or {}
+        self._cache = {}
+
+    def sha_of(self, path):
+        return self._shas.get(path)
+
+    def __getitem__(self, path):
+        if path not in self._cache:
+            raw = self._loaders[path]()
+            try:
+                self._cache[path] = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                self._cache[path] = raw
+        return self._cache[path]
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+class LocalPublishBackend(PublishBackend):
+    """Publishes into local bare git repositories (layout "bare") or plain
+    directories (layout "dir"), for tests and dry runs."""
+
+    def __init__(self, root=None, layout=None, pages_base=None):
+        self.root = root or os.getenv('LOCAL_PUBLISH_DIR', 'published')
+        self.layout = layout or os.getenv('LOCAL_PUBLISH_LAYOUT', 'bare')
+        if self.layout not in ('bare', 'dir'):
+            raise ValueError(f"Unknown local publish layout: {self.layout}")
+        self.pages_base = pages_base or os.getenv('LOCAL_PAGES_BASE')
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, repo_name):
+        suffix = '.git' if self.layout == 'bare' else ''
+        return os.path.join(self.root, repo_name + suffix)
+
+    def create_repo(self, repo_name, description):
+        path = self._path(repo_name)
+        try:
+            os.makedirs(path)
+            if self.layout == 'bare':
+                for sub in ('objects', os.path.join('refs', 'heads'), os.path.join('refs', 'tags')):
+                    os.makedirs(os.path.join(path, sub))
+                with open(os.path.join(path, 'HEAD'), 'w') as f:
+                    f.write("ref: refs/heads/main\n")
+                with open(os.path.join(path, 'config'), 'w') as f:
+                    f.write("[core]\n\trepositoryformatversion = 0\n\tbare = true\n")
+                with open(os.path.join(path, 'description'), 'w') as f:
+                    f.write(description + "\n")
+        except OSError as e:
+            print(f"Error creating local repo: {e}")
+            return None
+        return LocalRepo(repo_name, path)
+
+    def get_repo(self, repo_name):
+        path = self._path(repo_name)
+        return LocalRepo(repo_name, path) if os.path.isdir(path) else None
+
+    def find_latest_repo(self, pattern):
+        suffix = '.git' if self.layout == 'bare' else ''
+        matches = []
+        for entry in os.listdir(self.root):
+            name = entry[:-len(suffix)] if suffix and entry.endswith(suffix) else entry
+            if pattern.match(name):
+                matches.append(LocalRepo(name, os.path.join(self.root, entry)))
+        if not matches:
+            return None
+        return max(matches, key=lambda r: r.created_at)
+
+    def publish(self, repo, files, commit_message, existing_files=None):
+        try:
+            with self._lock:
+                if self.layout == 'bare':
+                    return self._commit_bare(repo, files, commit_message)
+                return self._write_dir(repo, files)
+        except OSError as e:
+            print(f"Error publishing locally: {e}")
+            return None
+
+    def _ref_path(self, repo):
+        return os.path.join(repo.path, 'refs', 'heads', 'main')
+
+    def _commit_bare(self, repo, files, commit_message):
+        old_sha = self.head_sha(repo)
+        entries = read_tree_entries(repo.path, old_sha) if old_sha else {}
+        graph = ObjectGraph()
+        for file_path, content in files.items():
+            entries[file_path] = ("100644", graph.add_blob(content))
+        commit_sha = graph.add_commit(graph.build_tree(entries), old_sha, commit_message)
+        graph.write_loose(repo.path)
+        tmp_path = self._ref_path(repo) + '.lock'
+        with open(tmp_path, 'w') as f:
+            f.write(commit_sha + "\n")
+        os.replace(tmp_path, self._ref_path(repo))
+        return commit_sha
+
+    def _write_dir(self, repo, files):
+        for file_path, content in files.items():
+            dest = os.path.join(repo.path, file_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, 'wb') as f:
+                f.write(content.encode('utf-8') if isinstance(content, str) else content)
+        return self._dir_tree_sha(repo)
+
+    def _dir_files(self, repo):
+        paths = []
+        for dirpath, _, filenames in os.walk(repo.path):
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                paths.append(os.path.relpath(full, repo.path).replace(os.sep, '/'))
+        return paths
+
+    def _dir_tree_sha(self, repo):
+        """Git tree hash of the directory, used as its content version"""
+        graph = ObjectGraph()
+        entries = {}
+        for path in self._dir_files(repo):
+            with open(os.path.join(repo.path, path), 'rb') as f:
+                entries[path] = ("100644", graph.add_blob(f.read()))
+        return graph.build_tree(entries) if entries else None
+
+    def existing_files(self, repo):
+        if self.layout == 'dir':
+            def loader(path):
+                def load():
+                    with open(os.path.join(repo.path, path), 'rb') as f:
+                        return f.read()
+                return load
+            return LocalFilesView({path: loader(path) for path in self._dir_files(repo)})
+
+        head = self.head_sha(repo)
+        entries = read_tree_entries(repo.path, head) if head else {}
+        loaders = {
+            path: (lambda sha=sha: read_loose(repo.path, sha)[1])
+            for path, (_, sha) in entries.items()
+        }
+        return LocalFilesView(loaders, {path: sha for path, (_, sha) in entries.items()})
+
+    def head_sha(self, repo):
+        if self.layout == 'dir':
+            return self._dir_tree_sha(repo)
+        try:
+            with open(self._ref_path(repo)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def repo_url(self, repo_name):
+        return f"file://{os.path.abspath(self._path(repo_name))}"
+
+    def pages_url(self, repo_name):
+        if self.pages_base:
+            return f"{self.pages_base.rstrip('/')}/{repo_name}/"
+        return f"file://{os.path.abspath(self._path(repo_name))}/"
+
+def get_publish_backend(user, token=None, name=None):
+    """Build the backend selected by PUBLISH_BACKEND (rest, git or local)"""
+    name = name or os.getenv('PUBLISH_BACKEND', 'rest')
+    if name == 'rest':
+        return RestPublishBackend(user)
+    if name == 'git':
+        return GitPushPublishBackend(user, token)
+    if name == 'local':
+        return LocalPublishBackend()
+    raise ValueError(f"Unknown publish backend: {name}")
@@ -0,0 +1,70 @@
+import base64
+import threading
+from collections.abc import Mapping
+from github import GithubException
+
+class RepoFilesView(Mapping):
+    """Read-only, lazily loaded view of the files in a repository.
+
+    The file list comes from a single recursive tree call; each file's
+    content is only downloaded the first time it is accessed and then cached.
+    API calls go through call(fn, *args, **kwargs) when given, e.g. a
+    publisher's call_api so they share its circuit breaker."""
+
+    def __init__(self, repo, ref="main", call=None):
+        self.repo = repo
+        self.ref = ref
+        self.call = call or (lambda fn, *args, **kwargs: fn(*args, **kwargs))
+        self._entries = None  # path -> blob sha
+        self._sizes = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _load_tree(self):
+        if self._entries is None:
+            try:
+                tree = self.call(self.repo.get_git_tree, self.ref, recursive=True)
+                blobs = [item for item in tree.tree if item.type == "blob"]
+                entries = {item.path: item.sha for item in blobs}
+                self._sizes = {item.path: item.size for item in blobs}
+            except GithubException as e:
+                # 404: no such branch, 409: empty repository. Anything else
+                # (rate limits, server errors) must not look like "no files".
+                if e.status not in (404, 409):
+                    raise
+                entries = {}
+            self._entries = entries
+        return self._entries
+
+    def sha_of(self, path):
+        """Blob sha of a file, or None if it does not exist"""
+        return self._load_tree().get(path)
+
+    def size_of(self, path):
+        """Size in bytes of a file from the tree listing, without fetching it"""
+        self._load_tree()
+        return self._sizes.get(path)
+
+    def __getitem__(self, path):
+        sha = self._load_tree()[path]
+        with self._lock:
+            if path in self._cache:
+                return self._cache[path]
+        blob = self.call(self.repo.get_git_blob, sha)
+        raw = base64.b64decode(blob.content) if blob.encoding == "base64" else blob.content.encode()
+        try:
+            content = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            content = raw
+        with self._lock:
+            self._cache[path] = content
+        return content
+
+    def __contains__(self, path):
+        return path in self._load_tree()
+
+    def __iter__(self):
+        return iter(self._load_tree())
+
+    def __len__(self):
+        return len(self._load_tree())
@@ -0,0 +1,223 @@
+import os
+import time
+import uuid
+import datetime
+import threading
+import requests
+from github import GithubException
+
+from .circuit_breaker import CircuitOpenError
+
+class RepoPool:
+    """Keeps a pool of pre-initialized repositories (LICENSE already on main)
+    so Round 1 deployments can skip repo creation and the LICENSE commit."""
+
+    def __init__(self, user, license_content, size=None, low_water=None,
+                 max_age=None, prefix=None, check_interval=None, call=None):
+        self.user = user
+        # Wrapper for GitHub API calls, e.g. RestPublishBackend.call_api so the
+        # pool shares the API's circuit breaker
+        self.call = call or (lambda fn, *args, **kwargs: fn(*args, **kwargs))
+        self.license_content = license_content
+        self.size = size if size is not None else int(os.getenv('REPO_POOL_SIZE', 0))
+        self.low_water = low_water if low_water is not None else int(
+            os.getenv('REPO_POOL_LOW_WATER', max(1, self.size // 2)))
+        self.max_age = max_age if max_age is not None else int(
+            os.getenv('REPO_POOL_MAX_AGE', 24 * 3600))
+        self.prefix = prefix or os.getenv('REPO_POOL_PREFIX', 'pool-')
+        self.check_interval = check_interval if check_interval is not None else int(
+            os.getenv('REPO_POOL_CHECK_INTERVAL', 60))
+
+        self._ready = []  # list of (repo, ready_at), oldest first
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.metrics = {
+            "claimed": 0,
+            "misses": 0,
+            "created": 0,
+            "create_failures": 0,
+            "expired": 0,
+            "discarded": 0,
+            "adopted": 0,
+            "claim_seconds_total": 0.0,
+            "create_seconds_total": 0.0,
+        }
+
+    @property
+    def enabled(self):
+        return self.user is not None and self.size > 0
+
+    def start(self):
+        """Adopt leftover pool repos and start the background replenisher"""
+        if not self.enabled or self._thread:
+            return
+        self._adopt_existing()
+        self._thread = threading.Thread(target=self._run, name="repo-pool", daemon=True)
+        self._thread.start()
+
+    def claim(self, task_id, brief):
+        """Take a ready repo, rename it for the task and update its description.
+
+        Returns (repo, repo_name) or (None, None) when the pool is empty."""
+        if not self.enabled:
+            return None, None
+        start = time.time()
+        while True:
+            with self._lock:
+                if not self._ready:
+                    self.metrics["misses"] += 1
+                    self._wakeup.set()
+                    return None, None
+                repo, ready_at = self._ready.pop(0)
+                low = len(self._ready) <= self.low_water
+            if low:
+                self._wakeup.set()
+
+            repo_name = f"task-{task_id}-{str(uuid.uuid4())[:8]}"
+            try:
+                self.call(repo.edit, name=repo_name, description=f"Auto-generated project: {brief[:100]}")
+            except GithubException as e:
+                if e.status == 404:
+                    # Repo was deleted behind our back; try the next one
+                    print(f"Pooled repo {repo.name} is gone: {e}")
+                    continue
+                print(f"Error claiming pooled repo {repo.name}: {e}")
+                self._return(repo, ready_at)
+                return None, None
+            except (requests.RequestException, CircuitOpenError) as e:
+                # The API is unreachable, not the repo: keep it for a later claim
+                print(f"Error claiming pooled repo {repo.name}: {e}")
+                self._return(repo, ready_at)
+                return None, None
+
+            with self._lock:
+                self.metrics["claimed"] += 1
+                self.metrics["claim_seconds_total"] += time.time() - start
+            return repo, repo_name
+
+    def _return(self, repo, ready_at):
+        """Put an unclaimed repo back at the front of the pool"""
+        with self._lock:
+            self._ready.insert(0, (repo, ready_at))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+            stats.update({
+                "enabled": self.enabled,
+                "ready": len(self._ready),
+                "size": self.size,
+                "low_water": self.low_water,
+                "max_age": self.max_age,
+            })
+        return stats
+
+    def _run(self):
+        while True:
+            try:
+                self._expire_stale()
+                self._replenish()
+            except Exception as e:
+                print(f"Repo pool replenisher error: {e}")
+            self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
+
+    def _replenish(self):
+        with self._lock:
+            ready = len(self._ready)
+        if ready > self.low_water:
+            return
+        for _ in range(self.size - ready):
+            repo = self._create_pooled_repo()
+            if repo is None:
+                break
+            with self._lock:
+                self._ready.append((repo, time.time()))
+
+    def _create_pooled_repo(self):
+        start = time.time()
+        name = f"{self.prefix}{str(uuid.uuid4())[:8]}"
+        try:
+            repo = self.call(
+                self.user.create_repo,
+                name=name,
+                description="Reserved for upcoming deployment",
+                private=False,
+                auto_init=False
+            )
+        except (GithubException, requests.RequestException, CircuitOpenError) as e:
+            print(f"Error creating pooled repo: {e}")
+            with self._lock:
+                self.metrics["create_failures"] += 1
+            return None
+        try:
+            self.call(repo.create_file, "LICENSE", "Initial commit - Add LICENSE", self.license_content)
+        except (GithubException, requests.RequestException, CircuitOpenError) as e:
+            # A pooled repo is claimed as already licensed; never keep one without LICENSE
+            print(f"Error adding LICENSE to pooled repo {name}: {e}")
+            self._delete(repo, "discarded")
+            with self._lock:
+                self.metrics["create_failures"] += 1
+            return None
+        with self._lock:
+            self.metrics["created"] += 1
+            self.metrics["create_seconds_total"] += time.time() - start
+        return repo
+
+    def _expire_stale(self):
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            stale = [item for item in self._ready if item[1] < cutoff]
+            self._ready = [item for item in self._ready if item[1] >= cutoff]
+        for repo, _ in stale:
+            self._delete(repo)
+
+    def _adopt_existing(self):
+        """Pick up pool repos left behind by a previous process"""
+        try:
+            repos = self.call(lambda: [r for r in self.user.get_repos() if r.name.startswith(self.prefix)])
+        except (GithubException, requests.RequestException, CircuitOpenError) as e:
+            print(f"Error listing pooled repos: {e}")
+            return
+        cutoff = time.time() - self.max_age
+        for repo in repos:
+            # PyGithub returns naive datetimes in UTC
+            created = repo.created_at.replace(tzinfo=datetime.timezone.utc).timestamp() if repo.created_at else 0
+            if created < cutoff or len(self._ready) >= self.size:
+                self._delete(repo)
+                continue
+            try:
+                initialized = self._has_license(repo)
+            except (GithubException, requests.RequestException, CircuitOpenError) as e:
+                print(f"Error checking pooled repo {repo.name}, not adopting it: {e}")
+                continue
+            if not initialized:
+                print(f"Pooled repo {repo.name} has no LICENSE on main, deleting it")
+                self._delete(repo, "discarded")
+                continue
+            with self._lock:
+                self._ready.append((repo, created))
+                self.metrics["adopted"] += 1
+        with self._lock:
+            self._ready.sort(key=lambda item: item[1])
+
+    def _has_license(self, repo):
+        """Whether main exists and has the LICENSE commit a pooled repo promises"""
+        try:
+            self.call(repo.get_branch, "main")
+            self.call(repo.get_contents, "LICENSE", ref="main")
+        except GithubException as e:
+            # 404: no such branch or file, 409: repository is empty
+            if e.status in (404, 409):
+                return False
+            raise
+        return True
+
+    def _delete(self, repo, metric="expired"):
+        try:
+            self.call(repo.delete)
+            with self._lock:
+                self.metrics[metric] += 1
+        except (GithubException, requests.RequestException, CircuitOpenError) as e:
+            print(f"Error deleting pooled repo {repo.name}: {e}")
@@ -0,0 +1,95 @@
+import io
+import os
+import zlib
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAX_DECOMPRESSED_BYTES = int(os.getenv('MAX_DECOMPRESSED_BYTES', 256 * 1024 * 1024))
+
+class UnsupportedEncodingError(ValueError):
+    """Content-Encoding the server cannot decode"""
+
+class BodyTooLargeError(ValueError):
+    """Decompressed body exceeds MAX_DECOMPRESSED_BYTES"""
+
+class _LimitedReader(io.RawIOBase):
+    """Reads from a stream and fails once more than max_bytes have come out"""
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.total = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            data = self.stream.read(len(buffer))
+        except (OSError, EOFError, ValueError):
+            raise
+        except Exception as e:
+            # zlib.error / zstandard.ZstdError don't share a useful base class
+            raise ValueError(f"Corrupt compressed body: {e}") from e
+        self.total += len(data)
+        if self.total > self.max_bytes:
+            raise BodyTooLargeError(f"Decompressed body exceeds {self.max_bytes} bytes")
+        buffer[:len(data)] = data
+        return len(data)
+
+class _ZlibReader(io.RawIOBase):
+    """Inflates a deflate stream, never producing more than the caller asked for"""
+
+    def __init__(self, stream, chunk_size=64 * 1024):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decompressor = zlib.decompressobj()
+        self.exhausted = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.decompressor.eof:
+            # Input held back by max_length last time comes before new input
+            chunk = self.decompressor.unconsumed_tail
+            if not chunk and not self.exhausted:
+                chunk = self.stream.read(self.chunk_size)
+                self.exhausted = not chunk
+            data = self.decompressor.decompress(chunk, len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            if self.exhausted and not self.decompressor.unconsumed_tail:
+                break
+        return 0
+
+def supported_encodings():
+    encodings = ['identity', 'gzip', 'deflate']
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+def decoded_stream(stream, content_encoding, max_bytes=None):
+    """Wrap a request body stream so it yields decompressed bytes.
+
+    Decompression happens incrementally as the body is read, bounded by
+    max_bytes of output."""
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        return stream
+    if encoding in ('gzip', 'x-gzip'):
+        decoded = gzip.GzipFile(fileobj=stream, mode='rb')
+    elif encoding == 'deflate':
+        decoded = _ZlibReader(stream)
+    elif encoding == 'zstd' and zstandard is not None:
+        decoded = zstandard.ZstdDecompressor().stream_reader(stream)
+    else:
+        raise UnsupportedEncodingError(
+            f"Unsupported Content-Encoding: {encoding} (supported: {', '.join(supported_encodings())})"
+        )
+    return io.BufferedReader(_LimitedReader(decoded, max_bytes or MAX_DECOMPRESSED_BYTES))
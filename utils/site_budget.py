@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import posixpath
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+# Approximate compressed transfer sizes of the CDN assets our generators use
+KNOWN_ASSET_BYTES = {
+    "bootstrap.min.css": 25_000,
+    "bootstrap.bundle.min.js": 23_000,
+    "marked.min.js": 12_000,
+    "highlight.min.js": 40_000,
+    "github.min.css": 1_000,
+}
+UNKNOWN_THIRD_PARTY_BYTES = 50_000
+
+DEFAULT_BUDGET = {
+    "max_page_weight_bytes": 500_000,
+    "max_blocking_third_party_requests": 3,
+    "max_third_party_bytes": 120_000,
+    "max_runtime_data_bytes": 1_000_000,
+}
+
+# Per-generator overrides of DEFAULT_BUDGET; SITE_BUDGETS (JSON) overrides these
+GENERATOR_BUDGETS = {
+    "SumOfSalesGenerator": {"max_blocking_third_party_requests": 2},
+    "GithubUserCreatedGenerator": {"max_blocking_third_party_requests": 2},
+    "MarkdownToHtmlGenerator": {"max_runtime_data_bytes": 0},
+}
+
+FETCH_PATTERN = re.compile(r"""fetch\(\s*(['"`])(.+?)\1""")
+
+class _PageParser(HTMLParser):
+    """Collects the subresources of an HTML page"""
+
+    def __init__(self):
+        super().__init__()
+        self.in_script = False
+        self.resources = []  # dicts with url, kind, blocking
+        self.inline_scripts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script":
+            if attrs.get("src"):
+                blocking = not ("async" in attrs or "defer" in attrs or attrs.get("type") == "module")
+                self.resources.append({"url": attrs["src"], "kind": "script", "blocking": blocking})
+            else:
+                self.in_script = True
+                self.inline_scripts.append("")
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower().split():
+            blocking = attrs.get("media", "all") in ("all", "screen", "")
+            self.resources.append({"url": attrs.get("href", ""), "kind": "stylesheet", "blocking": blocking})
+        elif tag == "img" and attrs.get("src"):
+            self.resources.append({"url": attrs["src"], "kind": "image", "blocking": False})
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self.in_script = False
+
+    def handle_data(self, data):
+        if self.in_script and self.inline_scripts:
+            self.inline_scripts[-1] += data
+
+def is_third_party(url):
+    return url.startswith("//") or bool(urlsplit(url).scheme in ("http", "https"))
+
+def third_party_bytes(url):
+    name = urlsplit(url).path.rsplit("/", 1)[-1]
+    return KNOWN_ASSET_BYTES.get(name, UNKNOWN_THIRD_PARTY_BYTES)
+
+class SiteAnalyzer:
+    """Offline page-weight analysis of a generated site before it is committed.
+
+    Pages in the generator's files dict are analyzed. When a round changes
+    only assets or data, the previous round's pages (existing_files) are
+    analyzed instead, which downloads those pages. Other local resources from
+    the previous round are measured with size_of when the view has it and are
+    never downloaded, so their scripts are not scanned for fetch() calls."""
+
+    def __init__(self, files, existing_files=None):
+        self.files = files or {}
+        self.existing_files = existing_files or {}
+
+    def _has(self, path):
+        return path in self.files or path in self.existing_files
+
+    def _content(self, path):
+        content = self.files[path] if path in self.files else self.existing_files[path]
+        return content.decode("utf-8", "replace") if isinstance(content, bytes) else content
+
+    def _size(self, path):
+        if path in self.files:
+            content = self.files[path]
+        else:
+            size_of = getattr(self.existing_files, "size_of", None)
+            size = size_of(path) if size_of else None
+            if size is not None:
+                return size
+            content = self.existing_files[path]
+        return len(content.encode("utf-8")) if isinstance(content, str) else len(content)
+
+    def pages(self):
+        pages = sorted(p for p in self.files if p.endswith(".html"))
+        if not pages and self.files:
+            # Changed assets or data still affect the unchanged pages using them
+            pages = sorted(p for p in self.existing_files if p.endswith(".html"))
+        return pages
+
+    @staticmethod
+    def resolve(page, url):
+        """Site path of a local URL referenced from page"""
+        path = urlsplit(url).path
+        if path.startswith("/"):
+            path = path.lstrip("/")
+        else:
+            path = posixpath.join(posixpath.dirname(page), path)
+        return posixpath.normpath(path)
+
+    def analyze_page(self, page):
+        parser = _PageParser()
+        parser.feed(self._content(page))
+        local_bytes = self._size(page)
+        third_party = {"requests": 0, "bytes": 0, "blocking_requests": 0, "blocking_bytes": 0}
+        scripts = list(parser.inline_scripts)
+        missing = []
+
+        for resource in parser.resources:
+            url = resource["url"]
+            if is_third_party(url):
+                size = third_party_bytes(url)
+                third_party["requests"] += 1
+                third_party["bytes"] += size
+                if resource["blocking"]:
+                    third_party["blocking_requests"] += 1
+                    third_party["blocking_bytes"] += size
+                continue
+            path = self.resolve(page, url)
+            if not self._has(path):
+                missing.append(path)
+                continue
+            local_bytes += self._size(path)
+            if resource["kind"] == "script" and path in self.files:
+                scripts.append(self._content(path))
+
+        runtime = {"requests": 0, "bytes": 0, "third_party_requests": 0, "urls": []}
+        for script in scripts:
+            for _, url in FETCH_PATTERN.findall(script):
+                runtime["requests"] += 1
+                runtime["urls"].append(url)
+                if is_third_party(url) or "${" in url:
+                    runtime["third_party_requests"] += 1
+                elif self._has(self.resolve(page, url)):
+                    runtime["bytes"] += self._size(self.resolve(page, url))
+
+        return {
+            "page_weight_bytes": local_bytes + third_party["bytes"] + runtime["bytes"],
+            "local_bytes": local_bytes,
+            "third_party": third_party,
+            "runtime_data": runtime,
+            "missing_local_resources": missing,
+        }
+
+    def analyze(self):
+        return {page: self.analyze_page(page) for page in self.pages()}
+
+def budget_for(generator_name):
+    budget = dict(DEFAULT_BUDGET)
+    budget.update(GENERATOR_BUDGETS.get(generator_name, {}))
+    overrides = os.getenv("SITE_BUDGETS")
+    if overrides:
+        try:
+            configured = json.loads(overrides)
+        except ValueError:
+            print("Ignoring SITE_BUDGETS: not valid JSON")
+            configured = {}
+        budget.update(configured.get("default", {}))
+        budget.update(configured.get(generator_name, {}))
+    return budget
+
+def check_budget(pages, budget):
+    """List budget violations across all analyzed pages"""
+    violations = []
+    limits = [
+        ("max_page_weight_bytes", lambda r: r["page_weight_bytes"], "page weight"),
+        ("max_blocking_third_party_requests", lambda r: r["third_party"]["blocking_requests"],
+         "blocking third-party requests"),
+        ("max_third_party_bytes", lambda r: r["third_party"]["bytes"], "third-party bytes"),
+        ("max_runtime_data_bytes", lambda r: r["runtime_data"]["bytes"], "runtime data bytes"),
+    ]
+    for page, result in pages.items():
+        for key, measure, label in limits:
+            value = measure(result)
+            if key in budget and value > budget[key]:
+                violations.append(f"{page}: {label} {value} exceeds budget {budget[key]}")
+    return violations
+
+def analyze_site(files, generator_name, existing_files=None):
+    """Analyze generated files against the generator's budget and return a report"""
+    pages = SiteAnalyzer(files, existing_files).analyze()
+    budget = budget_for(generator_name)
+    violations = check_budget(pages, budget)
+    return {
+        "generator": generator_name,
+        "budget": budget,
+        "pages": pages,
+        "violations": violations,
+        "within_budget": not violations,
+        "enforced": os.getenv("SITE_BUDGET_ENFORCE", "0") == "1",
+    }